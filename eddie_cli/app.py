@@ -6,6 +6,8 @@ import importlib.metadata
 import time
 
 from asyncer import asyncify
+from rich.markdown import Markdown
+from rich.markup import escape
 from textual.app import App, ComposeResult
 from textual.containers import Container, ScrollableContainer, Vertical
 from textual.events import Key
@@ -13,6 +15,9 @@ from textual.reactive import reactive
 from textual.widgets import Input, Static
 
 from .calls import EddieChat, load_memories
+from .markdown_blocks import MarkdownBlocks
+from .transcripts import SearchHit, transcripts
+from .usage import BudgetExceededError
 
 
 class MemoriesContainer(ScrollableContainer):
@@ -42,6 +47,41 @@ class ChatInput(Input):
         self.call_next(chat_messages.add_streaming_message, message)
 
 
+class StreamingMarkdown(Vertical):
+    """A Markdown message that renders incrementally as it is streamed.
+
+    Finished blocks are rendered once and cached in their own `Static`, so each new
+    chunk only re-renders the last, still open block.
+    """
+
+    def __init__(self, sender: str, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.sender = sender
+        self.blocks = MarkdownBlocks()
+        self.open_block = Static("...", classes="markdown-block")
+
+    def compose(self) -> ComposeResult:
+        yield Static(f"{self.sender}:", classes="sender")
+        yield self.open_block
+
+    def append(self, content: str) -> None:
+        """Appends streamed `content` to the message."""
+        self._mount_closed(self.blocks.feed(content))
+        self.open_block.update(Markdown(self.blocks.open))
+
+    def finish(self) -> None:
+        """Renders the final open block once the stream has ended."""
+        self._mount_closed(self.blocks.finish())
+        self.open_block.remove()
+
+    def _mount_closed(self, blocks: list[str]) -> None:
+        for block in blocks:
+            self.mount(
+                Static(Markdown(block), classes="markdown-block"),
+                before=self.open_block,
+            )
+
+
 class ChatMessages(ScrollableContainer):
     """The container for chat messages."""
 
@@ -66,38 +106,42 @@ class ChatMessages(ScrollableContainer):
 
     def add_streaming_message(self, message: str) -> None:
         """Adds a placeholder for a streaming message."""
-        self.mount(Static("Eddie: ...", classes="chat-message", id="streaming-message"))
-        asyncio.create_task(self.chat_with_eddie(message))
+        streaming_message = StreamingMarkdown("Eddie", classes="chat-message")
+        self.mount(streaming_message)
+        asyncio.create_task(self.chat_with_eddie(message, streaming_message))
 
-    async def chat_with_eddie(self, message: str) -> None:
+    async def chat_with_eddie(
+        self, message: str, streaming_message: StreamingMarkdown
+    ) -> None:
         """Chats with Eddie based on the user `message`."""
-        eddie_message = ""
 
         def update_and_refresh(content: str) -> None:
-            nonlocal eddie_message
-            eddie_message += content
-            self.update_streaming_message(eddie_message)
-            self.refresh()
+            self.app.call_from_thread(
+                self.update_streaming_message, streaming_message, content
+            )
 
         def handle_memory(memory: str) -> None:
             memories_container = self.app.query_one(MemoriesContainer)
             memories_container.memories = memories_container.memories + [memory]
 
-        await asyncify(self.app.eddie.chat)(message, update_and_refresh, handle_memory)
-        self.scroll_end()
-        self.call_after_refresh(self.finalize_streaming_message, eddie_message)
-
-    def update_streaming_message(self, content: str) -> None:
-        """Updates the streaming placeholder message."""
-        streaming_message = self.query_one("#streaming-message", Static)
-        streaming_message.update(f"Eddie: {content}")
+        try:
+            await asyncify(self.app.eddie.chat)(
+                message, update_and_refresh, handle_memory
+            )
+        except BudgetExceededError as e:
+            streaming_message.append(f"*(Budget exceeded: {e})*")
+        self.call_after_refresh(self.finalize_streaming_message, streaming_message)
+
+    def update_streaming_message(
+        self, streaming_message: StreamingMarkdown, content: str
+    ) -> None:
+        """Appends streamed `content` to the streaming message."""
+        streaming_message.append(content)
         self.scroll_end()
 
-    def finalize_streaming_message(self, message: str) -> None:
-        """Finalizes the streaming message into a normal message."""
-        streaming_message = self.query_one("#streaming-message", Static)
-        streaming_message.remove()
-        self.add_message(message, False)
+    def finalize_streaming_message(self, streaming_message: StreamingMarkdown) -> None:
+        """Finalizes the streaming message once Eddie is done replying."""
+        streaming_message.finish()
         self.scroll_end()
 
 
@@ -112,11 +156,55 @@ class ChatContainer(Vertical):
         self.query_one(ChatInput).focus()
 
 
+class SearchPanel(Vertical):
+    """The panel for searching past conversations."""
+
+    BORDER_TITLE = "Search"
+
+    # control characters can't appear in transcripts, so they safely mark matches
+    HIGHLIGHT = ("\x02", "\x03")
+
+    def compose(self) -> ComposeResult:
+        yield Input(placeholder="Search past conversations...", id="search-input")
+        yield ScrollableContainer(id="search-results")
+
+    async def on_input_submitted(self, event: Input.Submitted) -> None:
+        """Queries the transcript index only when a search is submitted."""
+        event.stop()
+        hits = await asyncify(transcripts.search)(
+            event.value, limit=20, highlight=self.HIGHLIGHT
+        )
+        results = self.query_one("#search-results", ScrollableContainer)
+        await results.remove_children()
+        if not hits:
+            await results.mount(Static("No matching conversations."))
+            return
+        await results.mount_all(
+            Static(self.render_hit(hit), classes="search-result") for hit in hits
+        )
+
+    def render_hit(self, hit: SearchHit) -> str:
+        """Renders a search hit as markup with its matches highlighted."""
+
+        def highlight(snippet: str) -> str:
+            start, end = self.HIGHLIGHT
+            return escape(snippet).replace(start, "[b]").replace(end, "[/b]")
+
+        date = datetime.datetime.fromtimestamp(hit.created_at)
+        return (
+            f"[dim]{date:%Y-%m-%d %H:%M}[/dim]\n"
+            f"You: {highlight(hit.user_snippet)}\n"
+            f"Eddie: {highlight(hit.assistant_snippet)}"
+        )
+
+
 class EddieApp(App):
     """Eddie - the retro AI-powered CLI assistant."""
 
     CSS_PATH = "app.tcss"
 
+    BINDINGS = [("ctrl+r", "toggle_search", "Search past conversations")]
+
     eddie: EddieChat = EddieChat()
 
     def compose(self) -> ComposeResult:
@@ -131,8 +219,18 @@ class EddieApp(App):
         yield Container(
             MemoriesContainer(id="memories-container"),
             ChatContainer(),
+            SearchPanel(),
             id="memories-chat",
         )
 
+    def action_toggle_search(self) -> None:
+        """Shows or hides the search panel."""
+        search_panel = self.query_one(SearchPanel)
+        search_panel.toggle_class("visible")
+        if search_panel.has_class("visible"):
+            self.query_one("#search-input", Input).focus()
+        else:
+            self.query_one(ChatInput).focus()
+
 
 __all__ = ("EddieApp",)
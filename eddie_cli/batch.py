@@ -0,0 +1,116 @@
+"""Eddie's non-interactive (batch) asking."""
+
+import json
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+
+from .calls import EddieChat
+
+WINDOW_PER_WORKER = 2
+"""How many requests per worker `ask_many` reads ahead of the results."""
+
+
+@dataclass
+class AskRequest:
+    """A single prompt to ask Eddie, tagged with an `id` for matching results.
+
+    A request whose input line couldn't be parsed carries the parse `error` instead
+    of a prompt, so it is reported as a failed result rather than ending the batch.
+    """
+
+    id: str
+    prompt: str
+    error: Optional[str] = None
+
+
+@dataclass
+class AskResult:
+    """The result of asking Eddie a single prompt."""
+
+    id: str
+    reply: str = ""
+    memories: list[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+    def to_json(self) -> str:
+        """Returns the result as a single JSON line."""
+        return json.dumps(asdict(self))
+
+
+def read_requests(lines: Iterable[str]) -> Iterator[AskRequest]:
+    """Parses JSONL `lines` into `AskRequest`s.
+
+    Each line must be either a JSON object with a `prompt` key (and an optional `id`
+    key) or a JSON string. Blank lines are skipped. Requests without an `id` are
+    tagged with their line number, as are malformed lines, which become requests
+    with an `error`.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield AskRequest(
+                id=str(line_number), prompt="", error=f"Invalid JSON on line: {e}"
+            )
+            continue
+        if isinstance(data, str):
+            yield AskRequest(id=str(line_number), prompt=data)
+        elif isinstance(data, dict) and isinstance(data.get("prompt"), str):
+            yield AskRequest(id=str(data.get("id", line_number)), prompt=data["prompt"])
+        else:
+            yield AskRequest(
+                id=str(line_number),
+                prompt="",
+                error="Expected a string or an object with a `prompt`.",
+            )
+
+
+def ask(request: AskRequest) -> AskResult:
+    """Asks Eddie a single prompt in a fresh, history-less chat."""
+    if request.error is not None:
+        return AskResult(id=request.id, error=request.error)
+    eddie = EddieChat()
+    result = AskResult(id=request.id)
+    chunks: list[str] = []
+    try:
+        eddie.chat(request.prompt, chunks.append, result.memories.append)
+    except Exception as e:
+        result.error = f"{e.__class__.__name__}: {e}"
+    result.reply = "".join(chunks)
+    return result
+
+
+def ask_many(requests: Iterable[AskRequest], workers: int = 4) -> Iterator[AskResult]:
+    """Asks Eddie each of the `requests` concurrently.
+
+    Results are yielded as soon as each request completes, so they will generally not
+    be in the same order as `requests`. Use `AskResult.id` to match them up. Only a
+    small window of requests is read ahead, so `requests` can be a stream (e.g.
+    stdin) and results are yielded while it is still being read.
+    """
+    requests = iter(requests)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {
+            executor.submit(ask, request)
+            for request in islice(requests, workers * WINDOW_PER_WORKER)
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+            pending |= {
+                executor.submit(ask, request) for request in islice(requests, len(done))
+            }
+
+
+__all__ = (
+    "AskRequest",
+    "AskResult",
+    "ask",
+    "ask_many",
+    "read_requests",
+)
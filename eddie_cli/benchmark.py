@@ -0,0 +1,378 @@
+"""Prompt-version regression benchmark.
+
+Loads every `EddieChat` revision in `.mirascope/versions/eddie_chat`, replays a fixed
+set of fixture conversations against a fake model backend (no network, no API key),
+and reports per-turn prompt token estimates, rendered prompt size, and latency.
+Reports are plain JSON so two runs can be compared to catch a prompt change that
+blows up per-turn cost before shipping it.
+
+Fixtures can be replayed on several threads to speed up the token measurements,
+but replays then compete for the GIL, so latency is only reported for serial runs.
+"""
+
+import importlib.util
+import inspect
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, cast
+
+from mirascope.base import BaseConfig
+from mirascope.openai import OpenAICall
+from openai.types.chat import (
+    ChatCompletion,
+    ChatCompletionChunk,
+    ChatCompletionMessageParam,
+)
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_chunk import Choice as ChunkChoice
+from openai.types.chat.chat_completion_chunk import ChoiceDelta
+from openai.types.chat.chat_completion_message import ChatCompletionMessage
+from openai.types.completion_usage import CompletionUsage
+
+from .tokens import estimate_message_tokens, estimate_tokens
+
+VERSIONS_DIR = Path(__file__).parent / ".mirascope" / "versions" / "eddie_chat"
+
+FIXTURES: list[dict[str, Any]] = [
+    {
+        "name": "greeting",
+        "turns": [
+            {"user": "Hey Eddie!", "reply": "Hello there! What can I do for you?"},
+            {"user": "Nothing, just saying hi.", "reply": "How delightfully social."},
+        ],
+    },
+    {
+        "name": "question",
+        "turns": [
+            {
+                "user": "What's the boiling point of water at sea level?",
+                "reply": "100 degrees Celsius, or 212 Fahrenheit if you insist.",
+            },
+            {
+                "user": "And on top of Everest?",
+                "reply": "About 70 degrees Celsius. Tea up there is a tragedy.",
+            },
+            {"user": "Thanks!", "reply": "Always a pleasure to be useful."},
+        ],
+    },
+    {
+        "name": "long-conversation",
+        "turns": [
+            {
+                "user": f"Tell me fact number {i} about the galaxy.",
+                "reply": f"Galaxy fact {i}: it is mostly harmless. " * 3,
+            }
+            for i in range(20)
+        ],
+    },
+]
+"""Fixture conversations, each a list of user inputs with the replies to replay."""
+
+MEMORY_COUNTS = (0, 10, 50)
+"""How many memories to seed versions that render memories into the prompt with."""
+
+
+class ReplayClient:
+    """A fake OpenAI client that replays canned replies and records the prompts."""
+
+    def __init__(self, replies: list[str], latency: float = 0.0) -> None:
+        self.replies = iter(replies)
+        self.latency = latency
+        self.prompts: list[list[ChatCompletionMessageParam]] = []
+        # mimic `client.chat.completions.create`
+        self.chat = self.completions = self
+
+    def create(
+        self,
+        messages: list[ChatCompletionMessageParam],
+        stream: bool = False,
+        **kwargs: Any,
+    ) -> Any:
+        self.prompts.append(messages)
+        reply = next(self.replies, "")
+        usage = CompletionUsage(
+            prompt_tokens=estimate_message_tokens(messages),
+            completion_tokens=estimate_tokens(reply),
+            total_tokens=estimate_message_tokens(messages) + estimate_tokens(reply),
+        )
+        time.sleep(self.latency)
+        if not stream:
+            return ChatCompletion(
+                id="replay",
+                choices=[
+                    Choice(
+                        index=0,
+                        finish_reason="stop",
+                        message=ChatCompletionMessage(role="assistant", content=reply),
+                    )
+                ],
+                created=int(time.time()),
+                model=kwargs.get("model", "replay"),
+                object="chat.completion",
+                usage=usage,
+            )
+        return self._stream(reply, kwargs.get("model", "replay"))
+
+    def _stream(self, reply: str, model: str) -> Iterator[ChatCompletionChunk]:
+        words = reply.split(" ")
+        for i, word in enumerate(words):
+            yield ChatCompletionChunk(
+                id="replay",
+                choices=[
+                    ChunkChoice(
+                        index=0,
+                        delta=ChoiceDelta(
+                            role="assistant", content=word if i == 0 else f" {word}"
+                        ),
+                        finish_reason=None if i < len(words) - 1 else "stop",
+                    )
+                ],
+                created=int(time.time()),
+                model=model,
+                object="chat.completion.chunk",
+            )
+
+
+def load_versions(versions_dir: Path = VERSIONS_DIR) -> dict[str, type[OpenAICall]]:
+    """Loads the `EddieChat` class of every revision in `versions_dir`."""
+    versions = {}
+    for path in sorted(versions_dir.glob("[0-9][0-9][0-9][0-9]_*.py")):
+        spec = importlib.util.spec_from_file_location(f"eddie_chat_{path.stem}", path)
+        if spec is None or spec.loader is None:
+            continue
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        versions[module.revision_id] = module.EddieChat
+    return versions
+
+
+@dataclass
+class TurnResult:
+    """Measurements for a single replayed chat turn."""
+
+    prompt_tokens: int
+    prompt_chars: int
+    latency_ms: float
+
+
+@dataclass
+class RunResult:
+    """Measurements for a single fixture conversation replayed against a version."""
+
+    version: str
+    fixture: str
+    memory_count: int
+    turns: list[TurnResult] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def run_fixture(
+    version: str,
+    eddie_chat: type[OpenAICall],
+    fixture: dict[str, Any],
+    memory_count: int = 0,
+    latency: float = 0.0,
+) -> RunResult:
+    """Replays a `fixture` conversation against a version of `EddieChat`."""
+    client = ReplayClient([turn["reply"] for turn in fixture["turns"]], latency)
+    replay_chat = cast(
+        type[OpenAICall],
+        type(
+            eddie_chat.__name__,
+            (eddie_chat,),
+            {
+                "__module__": eddie_chat.__module__,
+                "api_key": "replay",
+                "configuration": BaseConfig(client_wrappers=[lambda _: client]),
+            },
+        ),
+    )
+    fields = {}
+    if "memories" in replay_chat.model_fields:
+        fields["memories"] = [
+            f"User fact #{i}: likes thing number {i}." for i in range(memory_count)
+        ]
+    result = RunResult(
+        version=version, fixture=fixture["name"], memory_count=memory_count
+    )
+    try:
+        # every revision defines `chat`, but it isn't part of `OpenAICall`
+        chat: Callable[..., None] = getattr(replay_chat(**fields), "chat")
+        # later revisions take an extra callback for new memories
+        handlers = [lambda _: None] * (len(inspect.signature(chat).parameters) - 1)
+        for turn in fixture["turns"]:
+            prompts_before = len(client.prompts)
+            start = time.perf_counter()
+            chat(turn["user"], *handlers)
+            latency_ms = (time.perf_counter() - start) * 1000
+            for prompt in client.prompts[prompts_before:]:
+                result.turns.append(
+                    TurnResult(
+                        prompt_tokens=estimate_message_tokens(prompt),
+                        prompt_chars=sum(
+                            len(str(m.get("content") or "")) for m in prompt
+                        ),
+                        latency_ms=latency_ms,
+                    )
+                )
+    except Exception as e:
+        result.error = f"{e.__class__.__name__}: {e}"
+    return result
+
+
+def summarize(runs: list[RunResult], latency: bool = True) -> dict[str, Any]:
+    """Summarizes the runs of a single version.
+
+    Prompt tokens are summarized per memory count, since versions without memories
+    are only replayed without any. Latency is `None` unless `latency` is trusted.
+    """
+    turns = [turn for run in runs for turn in run.turns]
+    by_memories: dict[int, list[TurnResult]] = {}
+    for run in runs:
+        by_memories.setdefault(run.memory_count, []).extend(run.turns)
+    return {
+        "turns": len(turns),
+        "errors": sum(run.error is not None for run in runs),
+        "prompt_tokens_by_memory_count": {
+            str(count): {
+                "mean": statistics.fmean(t.prompt_tokens for t in turns),
+                "max": max(t.prompt_tokens for t in turns),
+            }
+            for count, turns in sorted(by_memories.items())
+            if turns
+        },
+        "mean_latency_ms": statistics.fmean(t.latency_ms for t in turns)
+        if turns and latency
+        else None,
+        "mean_prompt_chars_by_memory_count": {
+            str(count): statistics.fmean(t.prompt_chars for t in turns)
+            for count, turns in sorted(by_memories.items())
+            if turns
+        },
+    }
+
+
+def run_benchmark(
+    versions_dir: Path = VERSIONS_DIR,
+    fixtures: Optional[list[dict[str, Any]]] = None,
+    memory_counts: tuple[int, ...] = MEMORY_COUNTS,
+    latency: float = 0.0,
+    workers: int = 1,
+) -> dict[str, Any]:
+    """Replays `fixtures` against every version and returns a report.
+
+    With more than one of `workers`, fixtures are replayed in parallel and the
+    report's latencies are `None`.
+    """
+    fixtures = FIXTURES if fixtures is None else fixtures
+    versions = load_versions(versions_dir)
+    jobs: list[tuple[str, type[OpenAICall], dict[str, Any], int]] = [
+        (version, eddie_chat, fixture, memory_count)
+        for version, eddie_chat in versions.items()
+        for fixture in fixtures
+        for memory_count in (
+            memory_counts if "memories" in eddie_chat.model_fields else (0,)
+        )
+    ]
+
+    def replay(job: tuple[str, type[OpenAICall], dict[str, Any], int]) -> RunResult:
+        version, eddie_chat, fixture, memory_count = job
+        return run_fixture(version, eddie_chat, fixture, memory_count, latency)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        runs = list(executor.map(replay, jobs))
+    return {
+        "fixtures": [fixture["name"] for fixture in fixtures],
+        "workers": workers,
+        "versions": {
+            version: {
+                "summary": summarize(
+                    [run for run in runs if run.version == version],
+                    latency=workers == 1,
+                ),
+                "runs": [asdict(run) for run in runs if run.version == version],
+            }
+            for version in versions
+        },
+    }
+
+
+def _regressions(
+    name: str, new: dict[str, Any], old: dict[str, Any], tolerance: float
+) -> list[str]:
+    regressions = []
+    old_tokens = old["prompt_tokens_by_memory_count"]
+    for count, new_tokens in new["prompt_tokens_by_memory_count"].items():
+        # only compare like for like
+        if count not in old_tokens:
+            continue
+        for metric in ("mean", "max"):
+            before, after = old_tokens[count][metric], new_tokens[metric]
+            if after > before * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {metric} prompt tokens with {count} memories grew "
+                    f"from {before:.1f} to {after:.1f}"
+                )
+    if new["errors"] > old["errors"]:
+        regressions.append(
+            f"{name}: errors grew from {old['errors']} to {new['errors']}"
+        )
+    return regressions
+
+
+def compare(
+    report: dict[str, Any],
+    baseline: Optional[dict[str, Any]] = None,
+    tolerance: float = 0.1,
+) -> list[str]:
+    """Returns the regressions in `report`.
+
+    Without a `baseline`, the latest version is compared against the version before
+    it, which is what catches a new prompt revision that blows up per-turn cost.
+    With a `baseline` report, every version is compared against its own baseline
+    results. A version regresses when its mean or max per-turn prompt tokens with
+    the same number of memories grow by more than `tolerance` (a fraction), or when
+    it errors more often.
+    """
+    versions = report["versions"]
+    if baseline is None:
+        if len(versions) < 2:
+            return []
+        *_, previous, latest = sorted(versions)
+        return _regressions(
+            f"{latest} vs. {previous}",
+            versions[latest]["summary"],
+            versions[previous]["summary"],
+            tolerance,
+        )
+    return [
+        regression
+        for version, results in versions.items()
+        if version in baseline["versions"]
+        for regression in _regressions(
+            version,
+            results["summary"],
+            baseline["versions"][version]["summary"],
+            tolerance,
+        )
+    ]
+
+
+def write_report(report: dict[str, Any], path: Path) -> None:
+    """Writes `report` to `path` as JSON."""
+    path.write_text(json.dumps(report, indent=2) + "\n")
+
+
+__all__ = (
+    "FIXTURES",
+    "ReplayClient",
+    "compare",
+    "load_versions",
+    "run_benchmark",
+    "run_fixture",
+    "write_report",
+)
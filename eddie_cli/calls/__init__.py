@@ -1,8 +1,11 @@
 """Eddie's Mirascope Calls."""
 
-from .eddie_chat import EddieChat, load_memories
+from ..memories import load_memories
+from .eddie_chat import EddieChat
+from .merge_memories import MergeMemories
 
 __all__ = (
     "EddieChat",
+    "MergeMemories",
     "load_memories",
 )
@@ -1,40 +1,39 @@
 """Eddie's chat functionality."""
 
 import datetime
+import functools
 import json
-import os
-import pickle as pkl
 import sys
-from pathlib import Path
-from typing import Callable, Generator
+import uuid
+from typing import Callable, Generator, Iterable, Iterator, Optional
 
 from mirascope import tags
+from mirascope.base import BaseConfig
 from mirascope.openai import (
     OpenAICall,
     OpenAICallParams,
     OpenAICallResponseChunk,
+    OpenAITool,
     OpenAIToolStream,
 )
 from openai.types.chat import ChatCompletionMessageParam
-from pydantic import Field
-from typer import get_app_dir
+from pydantic import Field, PrivateAttr
 
+from ..memories import update_memories
+from ..scheduler import scheduler, without_sdk_retries
+from ..tiering import tiers
+from ..tokens import estimate_message_tokens
+from ..tools import registry
+from ..transcripts import transcripts
+from ..usage import BudgetExceededError, UsageRecord, budget, ledger
 
-def load_memories() -> list[str]:
-    """Loads Eddie's memories."""
-    app_dir = Path(get_app_dir("eddie-cli"))
-    if not os.path.exists(app_dir):
-        os.makedirs(app_dir)
-    filepath = app_dir / "memories.pkl"
-    if not os.path.exists(filepath):
-        with filepath.open(mode="wb") as f:
-            pkl.dump([], f)
-    with filepath.open(mode="rb") as f:
-        return pkl.load(f)
+MAX_TOOL_ROUNDS = 8
+"""How many rounds of tool calls a single turn may make before a reply is forced."""
 
 
-def memorize(memory: str) -> list[str]:
-    """Saves the `memory` and returns the list of all memories.
+@registry.register(saves_memory=True)
+def memorize(memory: str) -> str:
+    """Saves the `memory` to the user's memories.
 
     Args:
         memory: A memory synthesized from a user's input. This should just be a single
@@ -42,14 +41,10 @@ def memorize(memory: str) -> list[str]:
             to save something like "User is tall", "User likes golf", etc.
 
     Returns:
-        The list of memories updated with the saved `memory`.
+        The saved `memory`.
     """
-    memories = load_memories()
-    memories.append(memory)
-    filepath = Path(get_app_dir("eddie-cli")) / "memories.pkl"
-    with filepath.open(mode="wb") as f:
-        pkl.dump(memories, f)
-    return memories
+    update_memories(lambda memories: memories + [memory])
+    return memory
 
 
 @tags(["version:0005"])
@@ -79,11 +74,15 @@ class EddieChat(OpenAICall):
     {user_input}
     """
 
-    call_params = OpenAICallParams(tools=[memorize])
+    call_params = OpenAICallParams(tools=registry.fns)
+    configuration = BaseConfig(client_wrappers=[without_sdk_retries])
 
     user_input: str = ""
     history: list[ChatCompletionMessageParam] = []
-    memories: list[str] = Field(default_factory=load_memories)
+    memories: list[str] = Field(default_factory=tiers.hot_memories)
+    session_id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+
+    _tokens_used: int = PrivateAttr(default=0)
 
     @property
     def first_message(self) -> str:
@@ -117,53 +116,139 @@ class EddieChat(OpenAICall):
                 yield chunk
 
         self.user_input = user_input
-        stream = self.stream()
-        first_chunk = next(stream)
-        generator = regenerate(first_chunk, stream)
-        if first_chunk.delta and first_chunk.delta.content is None:
-            tool_stream = OpenAIToolStream.from_stream(generator)
-            tools, tool_messages, new_memories = [], [], []
-            for tool in tool_stream:
-                if tool:
-                    tools.append(tool)
-                    self.memories = tool.fn(**tool.args)
-                    handle_memory(self.memories[-1])
-                    new_memories.append(self.memories[-1])
-                    # this needs a convenience wrapper in Mirascope...
-                    tool_messages += [
-                        {
-                            "role": "tool",
-                            "content": new_memories[-1],
-                            "tool_call_id": tool.tool_call.id,
-                            "name": tool.__class__.__name__,
-                        }
-                    ]
-            self.history += [
-                {
-                    "content": None,
-                    "role": "assistant",
-                    "tool_calls": [
-                        {
-                            "id": tool.tool_call.id,
-                            "function": {
-                                "arguments": json.dumps(tool.args),
-                                "name": tool.__class__.__name__,
-                            },
-                            "type": "function",
-                        }
-                        for tool in tools
-                    ],
-                }
-            ] + tool_messages
-            self.chat("", handle_chunk_content, handle_memory)
-        else:
-            content = ""
-            for chunk in generator:
-                handle_chunk_content(chunk.content)
-                content += chunk.content
-            self.history += [
-                {"role": "user", "content": user_input},
-                {"role": "assistant", "content": content},
-            ]
-            # protect context limit == short-term memory loss
-            self.history = self.history[-30:]
+        self.memories = tiers.select(user_input)
+        tool_rounds = 0
+        while True:
+            tokens = self._fit_budget()
+            start: Callable[[], Iterator[OpenAICallResponseChunk]] = self.stream
+            if tool_rounds == MAX_TOOL_ROUNDS:
+                # a model that keeps calling tools would loop (and bill) forever
+                start = functools.partial(self.stream, tool_choice="none")
+            stream = self._track_usage(scheduler.stream(start, tokens))
+            first_chunk = next(stream)
+            generator = regenerate(first_chunk, stream)
+            if not (first_chunk.delta and first_chunk.delta.content is None):
+                break
+            if tool_rounds == MAX_TOOL_ROUNDS:
+                raise RuntimeError(
+                    f"Eddie kept calling tools after {MAX_TOOL_ROUNDS} rounds."
+                )
+            tool_rounds += 1
+            if self.user_input:
+                # tool calls must follow the user message they answer
+                self.history += [{"role": "user", "content": self.user_input}]
+                self.user_input = ""
+            self._call_tools(OpenAIToolStream.from_stream(generator), handle_memory)
+
+        content = ""
+        for chunk in generator:
+            handle_chunk_content(chunk.content)
+            content += chunk.content
+        if self.user_input:
+            self.history += [{"role": "user", "content": self.user_input}]
+        self.history += [{"role": "assistant", "content": content}]
+        # protect context limit == short-term memory loss
+        self.history = self.history[-30:]
+        while self.history and self.history[0]["role"] != "user":
+            # never start with tool messages whose tool calls were cut off
+            self.history = self.history[1:]
+        transcripts.add_turn(self.session_id, user_input, content)
+
+    def _fit_budget(self) -> int:
+        """Trims the context until the next request fits the token budget.
+
+        The oldest history is dropped first (but never the current turn), then the
+        oldest memories.
+
+        Returns:
+            The estimated prompt tokens of the next request.
+
+        Raises:
+            BudgetExceededError: if the request doesn't fit even without any history
+                or memories.
+        """
+        tokens = estimate_message_tokens(self.messages())
+        allowance = budget.allowance(self._tokens_used)
+        if allowance is None:
+            return tokens
+        turn_messages = 0
+        if not self.user_input:
+            # the current turn's user message has been moved into history
+            roles = [message["role"] for message in self.history]
+            turn_messages = len(roles) - max(
+                (i for i, role in enumerate(roles) if role == "user"), default=0
+            )
+        while tokens > allowance and len(self.history) > turn_messages:
+            self.history = self.history[1:]
+            while (
+                len(self.history) > turn_messages and self.history[0]["role"] != "user"
+            ):
+                self.history = self.history[1:]
+            tokens = estimate_message_tokens(self.messages())
+        while tokens > allowance and self.memories:
+            self.memories = self.memories[1:]
+            tokens = estimate_message_tokens(self.messages())
+        if tokens > allowance:
+            raise BudgetExceededError(
+                f"The next request needs ~{tokens} prompt tokens but only "
+                f"{max(allowance, 0)} remain in the token budget."
+            )
+        return tokens
+
+    def _track_usage(
+        self, stream: Iterator[OpenAICallResponseChunk]
+    ) -> Generator[OpenAICallResponseChunk, None, None]:
+        """Records the usage reported at the end of `stream` in the ledger."""
+        for chunk in stream:
+            if chunk.chunk.usage:
+                # priced by the requested model, since the reported one is dated
+                record = UsageRecord.from_usage(
+                    self.session_id, self.call_params.model, chunk.chunk.usage
+                )
+                ledger.record(record)
+                self._tokens_used += record.total_tokens
+            yield chunk
+
+    def _call_tools(
+        self,
+        tool_stream: Iterable[Optional[OpenAITool]],
+        handle_memory: Callable[[str], None],
+    ) -> None:
+        """Runs the streamed tool calls and adds them and their results to history.
+
+        Each tool starts running as soon as its call has been fully streamed, so
+        independent tools run concurrently while the rest of the response streams.
+        """
+        calls = [registry.submit(tool) for tool in tool_stream if tool]
+        results = registry.gather(calls)
+        self.history += [
+            {
+                "content": None,
+                "role": "assistant",
+                "tool_calls": [
+                    {
+                        "id": result.tool.tool_call.id,
+                        "function": {
+                            "arguments": json.dumps(result.tool.args),
+                            "name": result.tool.__class__.__name__,
+                        },
+                        "type": "function",
+                    }
+                    for result in results
+                ],
+            }
+        ] + [
+            # this needs a convenience wrapper in Mirascope...
+            {
+                "role": "tool",
+                "content": result.content,
+                "tool_call_id": result.tool.tool_call.id,
+                "name": result.tool.__class__.__name__,
+            }
+            for result in results
+        ]
+        for result in results:
+            # only this chat's own memories, not ones other processes saved meanwhile
+            if result.saved_memory is not None:
+                self.memories = self.memories + [result.saved_memory]
+                handle_memory(result.saved_memory)
@@ -0,0 +1,28 @@
+"""Merging overlapping memories into one."""
+
+from mirascope.base import BaseConfig
+from mirascope.openai import OpenAICall
+
+from ..scheduler import scheduler, without_sdk_retries
+
+
+class MergeMemories(OpenAICall):
+    prompt_template = """
+    SYSTEM:
+    You maintain a list of short memories about a user.
+    You will be given a group of overlapping memories, listed from oldest to newest.
+    Merge them into a single sentence that keeps every distinct fact.
+    When two memories contradict each other, keep the newest one.
+    Respond with only the merged memory.
+
+    USER:
+    {memories}
+    """
+
+    configuration = BaseConfig(client_wrappers=[without_sdk_retries])
+
+    memories: list[str]
+
+    def merge(self) -> str:
+        """Returns the merged memory."""
+        return "".join(chunk.content for chunk in scheduler.stream(self.stream)).strip()
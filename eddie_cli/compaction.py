@@ -0,0 +1,179 @@
+"""Compaction of Eddie's redundant and stale memories.
+
+Memories are clustered locally by TF-IDF cosine similarity (no network needed), and
+each cluster of two or more memories is compacted by a pluggable `Summarizer`.
+Similar memories often state different facts ("User is allergic to peanuts" /
+"User is allergic to cats"), so the local default only drops duplicates. Actually
+merging different facts needs the model.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Callable
+
+from .calls import MergeMemories
+from .memories import (
+    MemoryUsage,
+    load_memories,
+    memories_lock,
+    update_memories,
+    update_memory_usage,
+)
+from .similarity import cosine, tfidf_vectors
+from .tokens import estimate_tokens
+
+Summarizer = Callable[[list[str]], dict[str, list[str]]]
+"""Compacts a cluster of memories (oldest to newest).
+
+Returns the memories that replace the cluster, each mapped to the members of the
+cluster it replaces. Every member must be replaced by exactly one memory.
+"""
+
+
+def cluster_memories(memories: list[str], threshold: float = 0.3) -> list[list[int]]:
+    """Groups the indices of similar `memories`.
+
+    A memory joins the first cluster whose members it is all at least `threshold`
+    similar to, which avoids chaining loosely related memories together. Clusters
+    and their members are ordered by first appearance (i.e. oldest first).
+    """
+    vectors = tfidf_vectors(memories)
+    clusters: list[list[int]] = []
+    for i, vector in enumerate(vectors):
+        for cluster in clusters:
+            if all(cosine(vector, vectors[j]) >= threshold for j in cluster):
+                cluster.append(i)
+                break
+        else:
+            clusters.append([i])
+    return clusters
+
+
+def normalize(memory: str) -> str:
+    """Returns `memory` without differences in case, punctuation or whitespace.
+
+    Unlike `terms`, every word is kept: possessives, pronouns and qualifiers (e.g.
+    "User's wife", "used to") change what a memory says.
+    """
+    return " ".join(re.findall(r"[a-z0-9']+", memory.lower()))
+
+
+def drop_redundant(cluster: list[str]) -> dict[str, list[str]]:
+    """A local `Summarizer` that only drops duplicates of other memories.
+
+    Memories are duplicates when they only differ in case, punctuation or
+    whitespace. The newest phrasing of each is kept. Everything else says something
+    different, and only the model can tell whether it is safe to merge.
+    """
+    newest: dict[str, str] = {}
+    for memory in cluster:
+        newest[normalize(memory)] = memory
+    kept: dict[str, list[str]] = {memory: [] for memory in newest.values()}
+    for memory in cluster:
+        kept[newest[normalize(memory)]].append(memory)
+    return {memory: kept[memory] for memory in cluster if memory in kept}
+
+
+def merge_with_llm(cluster: list[str]) -> dict[str, list[str]]:
+    """A `Summarizer` that asks the model to merge the cluster into one memory."""
+    if merged := MergeMemories(memories=cluster).merge():
+        return {merged: cluster}
+    return drop_redundant(cluster)
+
+
+def memories_prompt_tokens(memories: list[str]) -> int:
+    """Estimates the prompt tokens the `{memories}` block costs on every request."""
+    return estimate_tokens("\n".join(memories))
+
+
+@dataclass
+class CompactionResult:
+    """The outcome of a memories compaction."""
+
+    before: list[str]
+    after: list[str]
+    merged: dict[str, list[str]] = field(default_factory=dict)
+    """Maps each merged memory to the memories it replaced."""
+    applied: bool = False
+
+    @property
+    def tokens_before(self) -> int:
+        return memories_prompt_tokens(self.before)
+
+    @property
+    def tokens_after(self) -> int:
+        return memories_prompt_tokens(self.after)
+
+
+def compact(
+    memories: list[str],
+    summarizer: Summarizer = drop_redundant,
+    threshold: float = 0.3,
+) -> CompactionResult:
+    """Compacts `memories` without touching the store."""
+    after, merged = [], {}
+    for cluster in cluster_memories(memories, threshold):
+        members = [memories[i] for i in cluster]
+        if len(members) == 1:
+            after.append(members[0])
+            continue
+        for memory, replaced in summarizer(members).items():
+            after.append(memory)
+            if replaced != [memory]:
+                merged[memory] = replaced
+    return CompactionResult(before=memories, after=after, merged=merged)
+
+
+def compact_memories(
+    summarizer: Summarizer = drop_redundant,
+    threshold: float = 0.3,
+    dry_run: bool = False,
+) -> CompactionResult:
+    """Compacts Eddie's stored memories and atomically rewrites the store.
+
+    Summarizing can be slow (e.g. `merge_with_llm`), so it runs on a snapshot
+    without holding the memories lock. Memories added concurrently in the meantime
+    are kept; if the store was otherwise rewritten, the compaction is not applied.
+    """
+    snapshot = load_memories()
+    result = compact(snapshot, summarizer, threshold)
+    if dry_run or not result.merged:
+        return result
+
+    def apply(current: list[str]) -> list[str]:
+        if current[: len(snapshot)] != snapshot:
+            return current
+        result.before = current
+        result.after = result.after + current[len(snapshot) :]
+        result.applied = True
+        return result.after
+
+    def merge_usage(memories: list[str], usage: dict[str, MemoryUsage]) -> None:
+        # merged memories inherit their cluster's stats so they keep their tier
+        for memory, cluster in result.merged.items():
+            stats = [usage[member] for member in cluster if member in usage]
+            if stats:
+                usage[memory] = MemoryUsage(
+                    created_at=min(s.created_at for s in stats),
+                    last_referenced_at=max(s.last_referenced_at for s in stats),
+                    hits=sum(s.hits for s in stats),
+                )
+
+    with memories_lock():
+        update_memories(apply)
+        if result.applied:
+            update_memory_usage(merge_usage)
+    return result
+
+
+__all__ = (
+    "CompactionResult",
+    "Summarizer",
+    "cluster_memories",
+    "compact",
+    "compact_memories",
+    "drop_redundant",
+    "memories_prompt_tokens",
+    "merge_with_llm",
+    "normalize",
+)
@@ -1,11 +1,22 @@
 import importlib.metadata  # noqa: E402
-import os
+import datetime
+import json
+import sys
+import time
 from pathlib import Path
+from typing import Optional
 
 import typer
 
+from . import memories
 from .app import EddieApp
+from .batch import ask_many, read_requests
+from .benchmark import compare, run_benchmark, write_report
 from .calls import EddieChat
+from .compaction import compact_memories, drop_redundant, merge_with_llm
+from .scheduler import scheduler
+from .transcripts import transcripts
+from .usage import BudgetExceededError, ledger
 
 cli = typer.Typer()
 
@@ -19,12 +30,59 @@ def version():
 @cli.command()
 def clear_memories():
     """Clears Eddie's memories of user information."""
-    app_dir = Path(typer.get_app_dir("eddie-cli"))
-    if not os.path.exists(app_dir):
-        return
-    filepath = app_dir / "memories.pkl"
-    if filepath.is_file():
-        filepath.unlink()
+    memories.clear_memories()
+
+
+@cli.command(name="compact-memories")
+def compact_memories_command(
+    llm: bool = typer.Option(
+        False,
+        help="Merge similar memories with the model. Without it, only duplicate "
+        "memories are dropped.",
+    ),
+    threshold: float = typer.Option(
+        0.3, min=0.0, max=1.0, help="How similar memories must be to merge."
+    ),
+    dry_run: bool = typer.Option(False, help="Report without rewriting memories."),
+    interval: Optional[float] = typer.Option(
+        None, help="Keep running in the background, compacting every N seconds."
+    ),
+):
+    """Merges Eddie's redundant and stale memories."""
+    while True:
+        result = compact_memories(
+            merge_with_llm if llm else drop_redundant, threshold, dry_run
+        )
+        for memory, cluster in result.merged.items():
+            print("Merged:" if result.applied else "Would merge:")
+            for member in cluster:
+                print(f"  - {member}")
+            print(f"  into: {memory}")
+        if result.merged and not (result.applied or dry_run):
+            print("Skipped: memories were rewritten during compaction.")
+        print(
+            f"Memories: {len(result.before)} -> {len(result.after)}, prompt tokens: "
+            f"~{result.tokens_before} -> ~{result.tokens_after}"
+        )
+        if interval is None:
+            break
+        time.sleep(interval)
+
+
+@cli.command()
+def search(
+    query: str = typer.Argument(..., help="The words to search for."),
+    limit: int = typer.Option(10, "--limit", "-n", min=1),
+):
+    """Searches past conversations with Eddie."""
+    hits = transcripts.search(query, limit=limit)
+    if not hits:
+        print("No matching conversations.")
+    for hit in hits:
+        date = datetime.datetime.fromtimestamp(hit.created_at)
+        print(f"{date:%Y-%m-%d %H:%M} (session {hit.session_id[:8]})")
+        print(f"  You: {hit.user_snippet}")
+        print(f"  Eddie: {hit.assistant_snippet}")
 
 
 @cli.command()
@@ -37,14 +95,145 @@ def chat():
         if user_input.lower() in ["exit", "quit"]:
             break
         print("Eddie: ", end="")
-        eddie.chat(
-            user_input,
-            lambda x: print(x, end="", flush=True),
-            lambda x: print(f"(ADDED MEMORY: {x})"),
-        )
+        try:
+            eddie.chat(
+                user_input,
+                lambda x: print(x, end="", flush=True),
+                lambda x: print(f"(ADDED MEMORY: {x})"),
+            )
+        except BudgetExceededError as e:
+            print(f"(BUDGET EXCEEDED: {e})", end="")
         print("\n", end="")
 
 
+@cli.command()
+def ask(
+    prompt: Optional[str] = typer.Argument(None, help="A single prompt to ask."),
+    file: Optional[str] = typer.Option(
+        None, "--file", "-f", help="A JSONL file of prompts, or `-` for stdin."
+    ),
+    workers: int = typer.Option(4, "--workers", "-w", min=1),
+    metrics: bool = typer.Option(
+        False, help="Print request scheduler metrics to stderr when done."
+    ),
+):
+    """Non-interactively ask Eddie a single prompt or a JSONL batch of prompts.
+
+    Each line of a batch should be `{"id": ..., "prompt": ...}` (or just a JSON
+    string). Prompts run concurrently and each result is printed as a JSON line as
+    soon as it completes.
+    """
+    if prompt is not None:
+        if file is not None:
+            raise typer.BadParameter("Pass either a PROMPT or --file, not both.")
+        try:
+            EddieChat().chat(
+                prompt,
+                lambda x: print(x, end="", flush=True),
+                lambda x: print(f"(ADDED MEMORY: {x})", file=sys.stderr),
+            )
+        except BudgetExceededError as e:
+            print(f"(BUDGET EXCEEDED: {e})", file=sys.stderr)
+            raise typer.Exit(code=1)
+        print()
+        return
+    if file is None:
+        raise typer.BadParameter("Pass either a PROMPT or --file.")
+
+    lines = sys.stdin if file == "-" else Path(file).open()
+    failed = False
+    with lines:
+        for result in ask_many(read_requests(lines), workers=workers):
+            print(result.to_json(), flush=True)
+            failed = failed or result.error is not None
+    if metrics:
+        print(json.dumps(vars(scheduler.metrics)), file=sys.stderr)
+    if failed:
+        raise typer.Exit(code=1)
+
+
+@cli.command()
+def usage(
+    by: str = typer.Option("day", help="Group usage by `day` or `session`."),
+    days: Optional[int] = typer.Option(
+        None, min=1, help="Only include the last N days."
+    ),
+):
+    """Reports Eddie's token usage and cost."""
+    if by not in ("day", "session"):
+        raise typer.BadParameter("--by must be `day` or `session`.")
+    since = time.time() - days * 24 * 60 * 60 if days else None
+    summaries = ledger.report(by=by, since=since)
+    if not summaries:
+        print("No usage recorded yet.")
+        return
+    print(
+        f"{by.capitalize():<32} {'Requests':>8} {'Prompt':>10} {'Cached':>10} "
+        f"{'Completion':>10} {'Cost':>9}"
+    )
+    for summary in summaries:
+        print(
+            f"{summary.key:<32} {summary.requests:>8} {summary.prompt_tokens:>10} "
+            f"{summary.cached_tokens:>10} {summary.completion_tokens:>10} "
+            f"${summary.cost:>8.4f}{'*' if summary.unpriced_requests else ''}"
+        )
+    unpriced = sum(summary.unpriced_requests for summary in summaries)
+    if unpriced:
+        print(f"* Excludes {unpriced} request(s) for models with an unknown price.")
+
+
+@cli.command()
+def benchmark(
+    output: Path = typer.Option(
+        Path("benchmark.json"), "--output", "-o", help="Where to write the report."
+    ),
+    baseline: Optional[Path] = typer.Option(
+        None, help="A previous report to compare against."
+    ),
+    tolerance: float = typer.Option(
+        0.1, help="The allowed fractional growth in per-turn prompt tokens."
+    ),
+    latency: float = typer.Option(
+        0.0, help="Simulated model latency in seconds per request."
+    ),
+    workers: int = typer.Option(
+        1,
+        "--workers",
+        "-w",
+        min=1,
+        help="Replay fixtures in parallel. Faster, but latency isn't reported.",
+    ),
+):
+    """Benchmarks every prompt version against a fake model backend.
+
+    Without --baseline, the latest version is compared against the previous one.
+    """
+    report = run_benchmark(latency=latency, workers=workers)
+    write_report(report, output)
+    for version, results in report["versions"].items():
+        summary = results["summary"]
+        tokens = ", ".join(
+            f"~{tokens['mean']:.0f} (max ~{tokens['max']}) with {count} memories"
+            for count, tokens in summary["prompt_tokens_by_memory_count"].items()
+        )
+        latency_text = (
+            f"{summary['mean_latency_ms']:.1f}ms/turn"
+            if summary["mean_latency_ms"] is not None
+            else "latency not measured"
+        )
+        print(
+            f"{version}: prompt tokens/turn {tokens}; {latency_text}; "
+            f"{summary['errors']} errors"
+        )
+    regressions = compare(
+        report, json.loads(baseline.read_text()) if baseline else None, tolerance
+    )
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        raise typer.Exit(code=1)
+
+
 @cli.command()
 def run(dev: bool = False):
     """Run Eddie's retro Textual app."""
@@ -0,0 +1,90 @@
+"""Incremental splitting of streamed Markdown into top-level blocks.
+
+Re-rendering a whole streamed reply as Markdown on every chunk is quadratic in the
+length of the reply. `MarkdownBlocks` instead tracks which top-level blocks
+(paragraphs, lists, code fences, headings, ...) are finished, so only the last,
+still open block ever needs to be re-parsed as new chunks arrive.
+"""
+
+import re
+
+FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+HEADING = re.compile(r"^ {0,3}#{1,6}(\s|$)")
+LIST_ITEM = re.compile(r"^ {0,3}([-+*]|\d{1,9}[.)])(\s|$)")
+
+
+class MarkdownBlocks:
+    """Splits streamed Markdown into finished blocks and a single open block."""
+
+    def __init__(self) -> None:
+        self.closed: list[str] = []
+        self._lines: list[str] = []
+        self._partial = ""
+        self._fence: str = ""
+        self._blank = False
+
+    @property
+    def open(self) -> str:
+        """The text of the block that is still being streamed."""
+        return "\n".join(self._lines + [self._partial]).strip("\n")
+
+    def feed(self, content: str) -> list[str]:
+        """Adds streamed `content` and returns the blocks it finished."""
+        closed_before = len(self.closed)
+        *lines, self._partial = (self._partial + content).split("\n")
+        for line in lines:
+            self._add_line(line)
+        return self.closed[closed_before:]
+
+    def finish(self) -> list[str]:
+        """Closes the open block at the end of the stream and returns it, if any."""
+        closed_before = len(self.closed)
+        if self._partial:
+            self._add_line(self._partial)
+            self._partial = ""
+        self._close()
+        return self.closed[closed_before:]
+
+    def _add_line(self, line: str) -> None:
+        if self._fence:
+            self._lines.append(line)
+            if re.fullmatch(
+                f"{re.escape(self._fence[0])}{{{len(self._fence)},}}", line.strip()
+            ):
+                self._fence = ""
+                self._close()
+            return
+        if not line.strip():
+            # whether a blank line ends the block depends on the next line
+            self._blank = bool(self._lines)
+            return
+        if self._blank and not self._continues(line):
+            self._close()
+        elif self._blank:
+            self._lines.append("")
+        self._blank = False
+        if fence := FENCE.match(line):
+            self._close()
+            self._fence = fence.group(1)[0] * len(fence.group(1))
+            self._lines.append(line)
+        elif HEADING.match(line):
+            self._close()
+            self._lines.append(line)
+            self._close()
+        else:
+            self._lines.append(line)
+
+    def _continues(self, line: str) -> bool:
+        """Whether `line` after a blank line continues the open (list) block."""
+        if not self._lines or not LIST_ITEM.match(self._lines[0]):
+            return False
+        return line[:1] in (" ", "\t") or bool(LIST_ITEM.match(line))
+
+    def _close(self) -> None:
+        if self._lines:
+            self.closed.append("\n".join(self._lines))
+        self._lines = []
+        self._blank = False
+
+
+__all__ = ("MarkdownBlocks",)
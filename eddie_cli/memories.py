@@ -0,0 +1,206 @@
+"""Eddie's persistent memories store.
+
+Memories are pickled to `memories.pkl` in Eddie's app directory. Multiple Eddie
+processes (e.g. `eddie chat` and `eddie run`) and threads (e.g. `eddie ask
+--workers`) may read and write the file at the same time, so every access goes
+through `memories_lock`, which combines a process-local lock with an `fcntl` file
+lock. Writes go to a temporary file that atomically replaces `memories.pkl`, so a
+crash mid-write can never leave a truncated file behind.
+"""
+
+import os
+import pickle as pkl
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator
+
+from typer import get_app_dir
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+_thread_lock = threading.RLock()
+_lock_state = threading.local()
+
+
+def app_dir() -> Path:
+    """Returns Eddie's app directory, creating it if necessary."""
+    path = Path(get_app_dir("eddie-cli"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def memories_path() -> Path:
+    """Returns the path to Eddie's memories file."""
+    return app_dir() / "memories.pkl"
+
+
+@contextmanager
+def memories_lock() -> Iterator[None]:
+    """Exclusively locks Eddie's memories across threads and processes.
+
+    The lock is re-entrant within a thread, so locked helpers can call each other.
+    """
+    with _thread_lock:
+        depth = getattr(_lock_state, "depth", 0)
+        if depth or fcntl is None:
+            _lock_state.depth = depth + 1
+            try:
+                yield
+            finally:
+                _lock_state.depth = depth
+            return
+        with (app_dir() / "memories.lock").open(mode="a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            _lock_state.depth = 1
+            try:
+                yield
+            finally:
+                _lock_state.depth = 0
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _quarantine(filepath: Path, error: Exception) -> None:
+    """Moves a corrupt file aside so Eddie can start fresh."""
+    corrupt_path = filepath.with_name(f"{filepath.name}.corrupt-{int(time.time())}")
+    os.replace(filepath, corrupt_path)
+    print(
+        f"Eddie's {filepath.name} was corrupt ({error.__class__.__name__}) and has "
+        f"been moved to {corrupt_path}. Starting fresh.",
+        file=sys.stderr,
+    )
+
+
+def load_memories() -> list[str]:
+    """Loads Eddie's memories."""
+    with memories_lock():
+        filepath = memories_path()
+        if not filepath.exists():
+            return []
+        try:
+            with filepath.open(mode="rb") as f:
+                memories = pkl.load(f)
+            if not isinstance(memories, list):
+                raise TypeError(f"expected a list, got {type(memories).__name__}")
+            return memories
+        except (EOFError, pkl.UnpicklingError, TypeError, ValueError) as e:
+            _quarantine(filepath, e)
+            return []
+
+
+def _atomic_dump(obj: object, filepath: Path) -> None:
+    """Pickles `obj` to a temporary file that then atomically replaces `filepath`."""
+    fd, tmp_path = tempfile.mkstemp(dir=filepath.parent, prefix=f".{filepath.stem}-")
+    try:
+        with os.fdopen(fd, mode="wb") as f:
+            pkl.dump(obj, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def save_memories(memories: list[str]) -> None:
+    """Atomically replaces Eddie's memories with `memories`."""
+    with memories_lock():
+        _atomic_dump(memories, memories_path())
+
+
+def update_memories(update: Callable[[list[str]], list[str]]) -> list[str]:
+    """Atomically read-modify-writes Eddie's memories and returns the result."""
+    with memories_lock():
+        memories = update(load_memories())
+        save_memories(memories)
+    return memories
+
+
+@dataclass
+class MemoryUsage:
+    """How often and how recently a memory has been relevant to a conversation."""
+
+    created_at: float = field(default_factory=time.time)
+    last_referenced_at: float = field(default_factory=time.time)
+    hits: int = 0
+
+
+def memory_usage_path() -> Path:
+    """Returns the path to Eddie's memory usage statistics file."""
+    return app_dir() / "memory_usage.pkl"
+
+
+def load_memory_usage() -> dict[str, MemoryUsage]:
+    """Loads usage statistics keyed by memory.
+
+    Statistics are only advisory, so a corrupt file is quarantined like a corrupt
+    memories file but never blocks Eddie from starting.
+    """
+    with memories_lock():
+        filepath = memory_usage_path()
+        if not filepath.exists():
+            return {}
+        try:
+            with filepath.open(mode="rb") as f:
+                usage = pkl.load(f)
+            if not isinstance(usage, dict):
+                raise TypeError(f"expected a dict, got {type(usage).__name__}")
+            return usage
+        except (
+            EOFError,
+            pkl.UnpicklingError,
+            TypeError,
+            ValueError,
+            AttributeError,
+        ) as e:
+            _quarantine(filepath, e)
+            return {}
+
+
+def update_memory_usage(
+    update: Callable[[list[str], dict[str, MemoryUsage]], None],
+) -> dict[str, MemoryUsage]:
+    """Atomically read-modify-writes memory usage statistics.
+
+    `update` receives the current memories and the stored usage (plus fresh entries
+    for memories that have none yet) and mutates the usage in place. Afterwards,
+    entries for memories that no longer exist are dropped.
+    """
+    with memories_lock():
+        memories = load_memories()
+        usage = load_memory_usage()
+        for memory in memories:
+            usage.setdefault(memory, MemoryUsage())
+        update(memories, usage)
+        usage = {memory: usage[memory] for memory in memories}
+        _atomic_dump(usage, memory_usage_path())
+    return usage
+
+
+def clear_memories() -> None:
+    """Deletes all of Eddie's memories."""
+    with memories_lock():
+        memories_path().unlink(missing_ok=True)
+        memory_usage_path().unlink(missing_ok=True)
+
+
+__all__ = (
+    "MemoryUsage",
+    "app_dir",
+    "clear_memories",
+    "load_memories",
+    "load_memory_usage",
+    "memories_lock",
+    "memories_path",
+    "memory_usage_path",
+    "save_memories",
+    "update_memories",
+    "update_memory_usage",
+)
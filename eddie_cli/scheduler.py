@@ -0,0 +1,275 @@
+"""Eddie's rate-limit-aware request scheduler.
+
+Every model call goes through a `RequestScheduler`, which throttles requests with
+request-per-minute and token-per-minute token buckets and retries rate-limited or
+transiently failing streams with exponential backoff before their first chunk.
+Calls must turn off the OpenAI SDK's own retries with `without_sdk_retries`, so the
+scheduler sees (and backs off from) every failed attempt.
+
+The default scheduler is configured through the `EDDIE_REQUESTS_PER_MINUTE` and
+`EDDIE_TOKENS_PER_MINUTE` environment variables (unlimited when unset).
+"""
+
+import email.utils
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterator, Mapping, Optional, TypeVar
+
+import openai
+
+T = TypeVar("T")
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+class TokenBucket:
+    """A thread-safe token bucket that refills continuously up to `capacity`."""
+
+    def __init__(
+        self,
+        capacity: float,
+        refill_per_second: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._clock = clock
+        self._level = capacity
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Reserves `amount` tokens and returns how many seconds to wait before use.
+
+        The reservation is taken immediately (the level may go negative), so waiting
+        callers queue up fairly behind each other instead of racing for refills.
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            self._level -= amount
+            if self._level >= 0:
+                return 0.0
+            return -self._level / self.refill_per_second
+
+    def drain(self) -> None:
+        """Empties the bucket, e.g. after the provider reports we are rate limited."""
+        with self._lock:
+            self._refill()
+            self._level = min(self._level, 0.0)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated_at
+        self._level = min(self.capacity, self._level + elapsed * self.refill_per_second)
+        self._updated_at = now
+
+
+@dataclass
+class SchedulerMetrics:
+    """A snapshot of a `RequestScheduler`'s activity."""
+
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    requests: int = 0
+    retries: int = 0
+    throttle_wait_seconds: float = 0.0
+    backoff_wait_seconds: float = 0.0
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parses rate limit durations like `"1.5"`, `"20ms"`, `"1s"`, or `"6m0s"`."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not parts or "".join(n + u for n, u in parts) != value.strip():
+        return None
+    scale = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+    return sum(float(n) * scale[u] for n, u in parts)
+
+
+def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Returns how many seconds the provider asked us to wait, if it said so.
+
+    Honors `retry-after-ms`, `retry-after` (seconds or an HTTP date), and OpenAI's
+    `x-ratelimit-reset-requests` / `x-ratelimit-reset-tokens` headers.
+    """
+    if (value := headers.get("retry-after-ms")) is not None:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    if (value := headers.get("retry-after")) is not None:
+        if (seconds := _parse_duration(value)) is not None:
+            return seconds
+        try:
+            date = email.utils.parsedate_to_datetime(value)
+            return max(0.0, date.timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+    resets = [
+        seconds
+        for header in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+        if (value := headers.get(header)) is not None
+        and (seconds := _parse_duration(value)) is not None
+    ]
+    return max(resets) if resets else None
+
+
+class RequestScheduler:
+    """Throttles and retries model requests.
+
+    Args:
+        requests_per_minute: The request-per-minute limit, or `None` for no limit.
+        tokens_per_minute: The token-per-minute limit, or `None` for no limit.
+        max_retries: How many times to retry a stream that fails before its first
+            chunk.
+        base_delay: The initial backoff delay in seconds (doubled on every retry).
+        max_delay: The maximum backoff delay in seconds.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.requests = (
+            TokenBucket(requests_per_minute, requests_per_minute / 60)
+            if requests_per_minute
+            else None
+        )
+        self.tokens = (
+            TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+            if tokens_per_minute
+            else None
+        )
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._metrics = SchedulerMetrics()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RequestScheduler":
+        """Creates a scheduler configured from `EDDIE_*` environment variables."""
+
+        def getenv(name: str) -> Optional[float]:
+            value = os.environ.get(name)
+            return float(value) if value else None
+
+        return cls(
+            requests_per_minute=getenv("EDDIE_REQUESTS_PER_MINUTE"),
+            tokens_per_minute=getenv("EDDIE_TOKENS_PER_MINUTE"),
+        )
+
+    @property
+    def metrics(self) -> SchedulerMetrics:
+        """Returns a snapshot of the scheduler's metrics."""
+        with self._lock:
+            return SchedulerMetrics(**vars(self._metrics))
+
+    def stream(self, start: Callable[[], Iterator[T]], tokens: int = 0) -> Iterator[T]:
+        """Streams from `start()` once the rate limits allow a request of `tokens`.
+
+        If the stream fails with a retryable error before yielding its first chunk,
+        it is transparently restarted after backing off. Failures after the first
+        chunk are raised as-is since the caller has already consumed output.
+        """
+        self._update(queue_depth=1)
+        try:
+            started = self._start(start, tokens)
+        finally:
+            self._update(queue_depth=-1)
+        if started is None:
+            return
+        stream, first = started
+        yield first
+        yield from stream
+
+    def _start(
+        self, start: Callable[[], Iterator[T]], tokens: int
+    ) -> Optional[tuple[Iterator[T], T]]:
+        for attempt in range(self.max_retries + 1):
+            self._throttle(tokens)
+            stream = iter(start())
+            try:
+                return stream, next(stream)
+            except StopIteration:
+                return None
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                self._backoff(attempt, e)
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    def _throttle(self, tokens: int) -> None:
+        wait = max(
+            self.requests.reserve(1) if self.requests else 0.0,
+            self.tokens.reserve(tokens) if self.tokens else 0.0,
+        )
+        if wait > 0:
+            self._update(throttle_wait_seconds=wait)
+            self._sleep(wait)
+        self._update(requests=1)
+
+    def _backoff(self, attempt: int, error: Exception) -> None:
+        delay = min(self.max_delay, self.base_delay * 2**attempt)
+        # full jitter on the upper half keeps concurrent retries from synchronizing
+        delay = random.uniform(delay / 2, delay)
+        response = getattr(error, "response", None)
+        if (
+            response is not None
+            and (requested := retry_after(response.headers)) is not None
+        ):
+            delay = max(delay, min(requested, self.max_delay))
+        if isinstance(error, openai.RateLimitError):
+            for bucket in (self.requests, self.tokens):
+                if bucket:
+                    bucket.drain()
+        self._update(retries=1, backoff_wait_seconds=delay)
+        self._sleep(delay)
+
+    def _update(self, **deltas: float) -> None:
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self._metrics, name, getattr(self._metrics, name) + delta)
+            self._metrics.max_queue_depth = max(
+                self._metrics.max_queue_depth, self._metrics.queue_depth
+            )
+
+
+def without_sdk_retries(client: openai.OpenAI) -> openai.OpenAI:
+    """A Mirascope client wrapper that turns off the OpenAI SDK's own retries.
+
+    Otherwise every scheduler attempt hides up to two SDK retries that neither the
+    rate limits nor the metrics know about.
+    """
+    return client.with_options(max_retries=0)
+
+
+scheduler = RequestScheduler.from_env()
+
+
+__all__ = (
+    "RequestScheduler",
+    "SchedulerMetrics",
+    "TokenBucket",
+    "retry_after",
+    "scheduler",
+    "without_sdk_retries",
+)
@@ -0,0 +1,68 @@
+"""Local (no network) text similarity for Eddie's memories."""
+
+import math
+import re
+from collections import Counter
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have he her his i in is it its me my "
+    "of on or our she so that the their them they this to user user's was we were "
+    "what when where which who why how with you your".split()
+)
+
+Vector = dict[str, float]
+
+
+def terms(text: str) -> list[str]:
+    """Returns the normalized content words of `text`."""
+    words = re.findall(r"[a-z0-9']+", text.lower())
+    # a crude stemmer is enough to match "plays"/"play" and "weekends"/"weekend"
+    return [
+        word[:-1] if len(word) > 3 and word.endswith("s") else word
+        for word in words
+        if word not in STOPWORDS
+    ]
+
+
+def tfidf_vectors(texts: list[str]) -> list[Vector]:
+    """Returns a unit-length TF-IDF vector for each of `texts`."""
+    docs = [terms(text) for text in texts]
+    document_frequency = Counter(term for doc in docs for term in set(doc))
+    vectors = []
+    for doc in docs:
+        vector = {
+            term: count
+            * (1 + math.log((1 + len(texts)) / (1 + document_frequency[term])))
+            for term, count in Counter(doc).items()
+        }
+        norm = math.sqrt(sum(weight**2 for weight in vector.values())) or 1.0
+        vectors.append({term: weight / norm for term, weight in vector.items()})
+    return vectors
+
+
+def cosine(a: Vector, b: Vector) -> float:
+    """Returns the cosine similarity of unit-length vectors `a` and `b`."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(term, 0.0) for term, weight in a.items())
+
+
+def search(
+    query: str, texts: list[str], limit: int = 5, threshold: float = 0.1
+) -> list[int]:
+    """Returns the indices of the `texts` most similar to `query`, best first."""
+    if not texts:
+        return []
+    *vectors, query_vector = tfidf_vectors(texts + [query])
+    scores = [(cosine(query_vector, vector), i) for i, vector in enumerate(vectors)]
+    return [
+        i for score, i in sorted(scores, reverse=True)[:limit] if score >= threshold
+    ]
+
+
+__all__ = (
+    "cosine",
+    "search",
+    "terms",
+    "tfidf_vectors",
+)
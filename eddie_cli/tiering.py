@@ -0,0 +1,131 @@
+"""Hot/cold tiering of Eddie's memories.
+
+Only the hot tier goes into every prompt. Memories are ranked by an LRFU-style score
+that combines how often they have been relevant (hits) with how recently (an
+exponential decay with a configurable half-life), and the best ones fill the hot
+tier up to a memory count and token cap. Everything else sits in the archive, which
+is only searched on demand for memories relevant to the current user input.
+Recalled memories get a hit, which promotes them into the hot tier on later turns,
+while memories that stop being relevant decay and get demoted.
+
+The default tiers are configured through the `EDDIE_HOT_MEMORIES` and
+`EDDIE_HOT_MEMORY_TOKENS` environment variables.
+"""
+
+import os
+import time
+from typing import Optional
+
+from .memories import MemoryUsage, load_memories, load_memory_usage, update_memory_usage
+from .similarity import search
+from .tokens import estimate_tokens
+
+SECONDS_PER_DAY = 60 * 60 * 24
+
+
+class MemoryTiers:
+    """Splits Eddie's memories into hot and archived tiers.
+
+    Args:
+        hot_size: The maximum number of memories in the hot tier.
+        hot_tokens: The maximum (estimated) prompt tokens of the hot tier.
+        recall_limit: The maximum number of archived memories recalled per turn.
+        recall_threshold: How similar an archived memory must be to be recalled.
+        half_life_days: How many days it takes an unreferenced memory's score to halve.
+    """
+
+    def __init__(
+        self,
+        hot_size: int = 50,
+        hot_tokens: int = 1000,
+        recall_limit: int = 5,
+        recall_threshold: float = 0.2,
+        half_life_days: float = 7.0,
+    ) -> None:
+        self.hot_size = hot_size
+        self.hot_tokens = hot_tokens
+        self.recall_limit = recall_limit
+        self.recall_threshold = recall_threshold
+        self.half_life_days = half_life_days
+
+    @classmethod
+    def from_env(cls) -> "MemoryTiers":
+        """Creates tiers configured from `EDDIE_*` environment variables."""
+        tiers = cls()
+        if value := os.environ.get("EDDIE_HOT_MEMORIES"):
+            tiers.hot_size = int(value)
+        if value := os.environ.get("EDDIE_HOT_MEMORY_TOKENS"):
+            tiers.hot_tokens = int(value)
+        return tiers
+
+    def score(self, usage: MemoryUsage, now: Optional[float] = None) -> float:
+        """Returns how deserving of the hot tier a memory with `usage` is."""
+        age = (now or time.time()) - usage.last_referenced_at
+        return (usage.hits + 1) * 0.5 ** (age / (self.half_life_days * SECONDS_PER_DAY))
+
+    def split(
+        self, memories: list[str], usage: dict[str, MemoryUsage]
+    ) -> tuple[list[str], list[str]]:
+        """Returns the `(hot, archived)` tiers of `memories`.
+
+        Both tiers keep the stored order of `memories` so the rendered prompt stays
+        stable between turns.
+        """
+        now = time.time()
+        ranked = sorted(
+            range(len(memories)),
+            key=lambda i: self.score(usage.get(memories[i]) or MemoryUsage(), now),
+            reverse=True,
+        )
+        hot, tokens = set(), 0
+        for i in ranked[: self.hot_size]:
+            # every memory is rendered on its own line
+            cost = estimate_tokens(memories[i]) + 1
+            if tokens + cost > self.hot_tokens:
+                continue
+            hot.add(i)
+            tokens += cost
+        return (
+            [memory for i, memory in enumerate(memories) if i in hot],
+            [memory for i, memory in enumerate(memories) if i not in hot],
+        )
+
+    def hot_memories(self) -> list[str]:
+        """Returns the memories currently in the hot tier."""
+        return self.split(load_memories(), load_memory_usage())[0]
+
+    def select(self, query: str) -> list[str]:
+        """Returns the hot tier plus archived memories relevant to `query`.
+
+        Every returned memory that is relevant to `query` is recorded as a hit.
+        """
+        selected: list[str] = []
+
+        def record_hits(memories: list[str], usage: dict[str, MemoryUsage]) -> None:
+            hot, archive = self.split(memories, usage)
+            recalled = [
+                archive[i]
+                for i in search(
+                    query, archive, self.recall_limit, self.recall_threshold
+                )
+            ]
+            relevant = [
+                hot[i] for i in search(query, hot, len(hot), self.recall_threshold)
+            ]
+            now = time.time()
+            for memory in recalled + relevant:
+                usage[memory].hits += 1
+                usage[memory].last_referenced_at = now
+            selected.extend(hot + recalled)
+
+        update_memory_usage(record_hits)
+        return selected
+
+
+tiers = MemoryTiers.from_env()
+
+
+__all__ = (
+    "MemoryTiers",
+    "tiers",
+)
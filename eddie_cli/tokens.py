@@ -0,0 +1,30 @@
+"""Cheap, local token estimates for Eddie's prompts."""
+
+from typing import Iterable
+
+from openai.types.chat import ChatCompletionMessageParam
+
+# OpenAI's rule of thumb: one token is roughly four characters of English text.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Returns a rough estimate of the number of tokens in `text`."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def estimate_message_tokens(messages: Iterable[ChatCompletionMessageParam]) -> int:
+    """Returns a rough estimate of the number of prompt tokens in `messages`."""
+    total = 0
+    for message in messages:
+        content = message.get("content")
+        total += estimate_tokens(content) if isinstance(content, str) else 0
+        # every message carries a few tokens of role/formatting overhead
+        total += 4
+    return total
+
+
+__all__ = (
+    "estimate_message_tokens",
+    "estimate_tokens",
+)
@@ -0,0 +1,219 @@
+"""Eddie's tool registry.
+
+Tools are plain functions registered with `registry`, which turns them into the
+`tools` call parameter and executes the tool calls from a single model response
+concurrently on a thread pool. Each tool declares its own timeout and whether it
+saves a memory, so the chat loop doesn't need to know about any tool.
+
+A timed out tool call is abandoned, not stopped: Python threads can't be cancelled,
+so it keeps running on its pool thread until it returns. Tools must therefore bound
+their own work (see `calculate`) rather than rely on their timeout.
+"""
+
+import ast
+import json
+import math
+import operator
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, TypeVar, overload
+
+from mirascope.openai import OpenAITool
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class ToolSpec:
+    """A registered tool and how to run it."""
+
+    fn: Callable[..., Any]
+    timeout: float = 30.0
+    saves_memory: bool = False
+
+
+@dataclass
+class ToolCall:
+    """A tool call running in the background."""
+
+    tool: OpenAITool
+    future: Future
+    deadline: float
+
+
+@dataclass
+class ToolResult:
+    """The outcome of a single tool call, ready to be fed back to the model."""
+
+    tool: OpenAITool
+    content: str
+    saved_memory: Optional[str] = None
+    """The memory the call saved, for tools registered with `saves_memory`."""
+
+
+class ToolRegistry:
+    """Registers tools and runs their calls concurrently with per-tool timeouts."""
+
+    def __init__(self, max_workers: int = 8) -> None:
+        self._specs: dict[Callable[..., Any], ToolSpec] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="eddie-tool"
+        )
+
+    @overload
+    def register(self, fn: F) -> F: ...
+
+    @overload
+    def register(
+        self, *, timeout: float = 30.0, saves_memory: bool = False
+    ) -> Callable[[F], F]: ...
+
+    def register(
+        self,
+        fn: Optional[F] = None,
+        *,
+        timeout: float = 30.0,
+        saves_memory: bool = False,
+    ) -> Any:
+        """Registers `fn` as a tool. Can be used as a (parameterized) decorator.
+
+        Tools registered with `saves_memory` must return the memory they saved.
+        """
+
+        def decorator(fn: F) -> F:
+            self._specs[fn] = ToolSpec(fn, timeout, saves_memory)
+            return fn
+
+        return decorator if fn is None else decorator(fn)
+
+    @property
+    def fns(self) -> list[Callable[..., Any]]:
+        """The registered tool functions, e.g. for `OpenAICallParams(tools=...)`."""
+        return list(self._specs)
+
+    def submit(self, tool: OpenAITool) -> ToolCall:
+        """Starts running `tool` in the background."""
+        spec = self._specs[tool.fn]
+        future = self._executor.submit(tool.fn, **tool.args)
+        return ToolCall(tool, future, time.monotonic() + spec.timeout)
+
+    def run(self, tools: list[OpenAITool]) -> list[ToolResult]:
+        """Runs `tools` concurrently and returns their results in call order."""
+        return self.gather([self.submit(tool) for tool in tools])
+
+    def gather(self, calls: list[ToolCall]) -> list[ToolResult]:
+        """Waits for submitted tool calls and returns their results in call order.
+
+        A tool that fails or runs past its deadline produces an error message for
+        the model instead of failing the whole turn. A timed out call is abandoned
+        but keeps running in the background until it returns.
+        """
+        results = []
+        for call in calls:
+            spec = self._specs[call.tool.fn]
+            name = call.tool.__class__.__name__
+            saved_memory = None
+            try:
+                timeout = max(0.0, call.deadline - time.monotonic())
+                value = call.future.result(timeout=timeout)
+                content = value if isinstance(value, str) else json.dumps(value)
+                if spec.saves_memory:
+                    saved_memory = value
+            except FutureTimeoutError:
+                content = f"Error: `{name}` timed out after {spec.timeout:g}s."
+            except Exception as e:
+                content = f"Error: `{name}` failed with {e.__class__.__name__}: {e}"
+            results.append(ToolResult(call.tool, content, saved_memory))
+        return results
+
+
+registry = ToolRegistry()
+
+_OPERATORS: dict[type, Callable[..., Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+_FUNCTIONS = {
+    name: getattr(math, name)
+    for name in ("sqrt", "log", "log10", "exp", "sin", "cos", "tan", "floor", "ceil")
+} | {"abs": abs, "round": round}
+_CONSTANTS = {"pi": math.pi, "e": math.e}
+# big int arithmetic holds the GIL and can't be interrupted, so results are bounded
+# before computing them rather than relying on the tool's timeout
+_MAX_INT_BITS = 10_000
+_MAX_ROUND_DIGITS = 100
+
+
+def _check_size(op: ast.operator, left: float, right: float) -> None:
+    if not (isinstance(left, int) and isinstance(right, int)):
+        # float arithmetic is fast and raises `OverflowError` instead
+        return
+    if isinstance(op, ast.Pow) and abs(left) > 1 and right > 0:
+        bits = abs(left).bit_length() * right
+    elif isinstance(op, ast.Mult):
+        bits = abs(left).bit_length() + abs(right).bit_length()
+    else:
+        return
+    if bits > _MAX_INT_BITS:
+        raise ValueError("result too large")
+
+
+def _evaluate(node: ast.AST) -> float:
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return node.value
+    if isinstance(node, ast.Name) and node.id in _CONSTANTS:
+        return _CONSTANTS[node.id]
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _OPERATORS:
+        return _OPERATORS[type(node.op)](_evaluate(node.operand))
+    if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+        left, right = _evaluate(node.left), _evaluate(node.right)
+        _check_size(node.op, left, right)
+        return _OPERATORS[type(node.op)](left, right)
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id in _FUNCTIONS
+        and not node.keywords
+    ):
+        args = [_evaluate(arg) for arg in node.args]
+        # `round` is linear in `ndigits`, so a huge one would hang just like a power
+        if node.func.id == "round" and len(args) == 2:
+            if not isinstance(args[1], int) or abs(args[1]) > _MAX_ROUND_DIGITS:
+                raise ValueError(f"round() takes at most {_MAX_ROUND_DIGITS} digits")
+        return _FUNCTIONS[node.func.id](*args)
+    raise ValueError(f"unsupported expression: {ast.unparse(node)}")
+
+
+@registry.register(timeout=5.0)
+def calculate(expression: str) -> str:
+    """Evaluates an arithmetic expression and returns the result.
+
+    Use this for any math instead of computing it yourself.
+
+    Args:
+        expression: A Python-style arithmetic expression, e.g. "2 * (3 + 4) ** 2".
+            Supports + - * / // % **, pi, e, and sqrt, log, log10, exp, sin, cos,
+            tan, floor, ceil, abs and round.
+    """
+    return str(_evaluate(ast.parse(expression, mode="eval")))
+
+
+__all__ = (
+    "ToolCall",
+    "ToolRegistry",
+    "ToolResult",
+    "ToolSpec",
+    "calculate",
+    "registry",
+)
@@ -0,0 +1,115 @@
+"""Eddie's indexed conversation transcripts.
+
+Every completed chat turn is appended to `transcripts.db` (SQLite) in Eddie's app
+directory and indexed incrementally with an FTS5 full-text index, so past
+conversations can be searched with ranked snippets without ever loading whole
+transcripts into memory.
+"""
+
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from .memories import app_dir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    user TEXT NOT NULL,
+    assistant TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5(
+    user, assistant, content='turns', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS turns_ai AFTER INSERT ON turns BEGIN
+    INSERT INTO turns_fts(rowid, user, assistant)
+    VALUES (new.id, new.user, new.assistant);
+END;
+"""
+
+
+@dataclass
+class SearchHit:
+    """A past chat turn matching a search, with highlighted snippets."""
+
+    session_id: str
+    created_at: float
+    user_snippet: str
+    assistant_snippet: str
+    rank: float
+
+
+def _match_expression(query: str) -> str:
+    """Turns free text into an FTS5 query matching all of its words.
+
+    Quoting every word keeps user input from being parsed as FTS5 query syntax.
+    """
+    return " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+
+
+class TranscriptIndex:
+    """An append-only, full-text indexed store of chat turns."""
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self._path = path
+
+    @property
+    def path(self) -> Path:
+        return self._path or app_dir() / "transcripts.db"
+
+    def _connect(self) -> sqlite3.Connection:
+        # short-lived connections keep the index safe to use from any thread
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.executescript(SCHEMA)
+        return connection
+
+    def add_turn(self, session_id: str, user: str, assistant: str) -> None:
+        """Appends a completed turn and indexes it."""
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT INTO turns (session_id, created_at, user, assistant) "
+                "VALUES (?, ?, ?, ?)",
+                (session_id, time.time(), user, assistant),
+            )
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        offset: int = 0,
+        highlight: tuple[str, str] = ("[", "]"),
+    ) -> list[SearchHit]:
+        """Returns the turns best matching `query`, most relevant first."""
+        if not (expression := _match_expression(query)):
+            return []
+        start, end = highlight
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                """
+                SELECT turns.session_id, turns.created_at,
+                    snippet(turns_fts, 0, ?, ?, '…', 12),
+                    snippet(turns_fts, 1, ?, ?, '…', 12),
+                    bm25(turns_fts) AS rank
+                FROM turns_fts JOIN turns ON turns.id = turns_fts.rowid
+                WHERE turns_fts MATCH ?
+                ORDER BY rank
+                LIMIT ? OFFSET ?
+                """,
+                (start, end, start, end, expression, limit, offset),
+            ).fetchall()
+        return [SearchHit(*row) for row in rows]
+
+
+transcripts = TranscriptIndex()
+
+
+__all__ = (
+    "SearchHit",
+    "TranscriptIndex",
+    "transcripts",
+)
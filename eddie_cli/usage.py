@@ -0,0 +1,214 @@
+"""Eddie's token usage and cost ledger, and per-session token budgets.
+
+Every model request's usage is appended as one CSV row to `usage.csv` in Eddie's
+app directory, which `eddie usage` aggregates per day or per session.
+
+The default budget is configured through the `EDDIE_SESSION_TOKEN_BUDGET` (total
+tokens per chat session) and `EDDIE_PROMPT_TOKEN_BUDGET` (prompt tokens per
+request) environment variables (unlimited when unset).
+"""
+
+import csv
+import datetime
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from mirascope.openai.utils import openai_api_calculate_cost
+from openai.types.completion_usage import CompletionUsage
+
+from .memories import app_dir
+
+_DATE_SUFFIX = re.compile(r"-\d{4}-\d{2}-\d{2}$")
+
+
+class BudgetExceededError(Exception):
+    """Raised when a turn can't fit in the remaining token budget."""
+
+
+@dataclass
+class UsageRecord:
+    """The token usage of a single model request."""
+
+    timestamp: float
+    session_id: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    cached_tokens: int = 0
+    cost: Optional[float] = None
+    """The cost in USD, or `None` if the model's price is unknown."""
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @classmethod
+    def from_usage(
+        cls, session_id: str, model: str, usage: CompletionUsage
+    ) -> "UsageRecord":
+        """Creates a record from the usage reported at the end of a stream.
+
+        `model` should be the requested model, since the API reports dated snapshot
+        names that aren't all priced. A snapshot's date is stripped if it is.
+        """
+        details: Any = getattr(usage, "prompt_tokens_details", None) or {}
+        cached = (
+            details.get("cached_tokens")
+            if isinstance(details, dict)
+            else getattr(details, "cached_tokens", 0)
+        )
+        cost = openai_api_calculate_cost(usage, model)
+        if cost is None and _DATE_SUFFIX.search(model):
+            cost = openai_api_calculate_cost(usage, _DATE_SUFFIX.sub("", model))
+        return cls(
+            timestamp=time.time(),
+            session_id=session_id,
+            model=model,
+            prompt_tokens=usage.prompt_tokens,
+            completion_tokens=usage.completion_tokens,
+            cached_tokens=cached or 0,
+            cost=cost,
+        )
+
+
+@dataclass
+class UsageSummary:
+    """Aggregated usage for a day or a session."""
+
+    key: str
+    requests: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+    """The cost in USD of the requests whose cost is known."""
+    unpriced_requests: int = 0
+
+    def add(self, record: UsageRecord) -> None:
+        self.requests += 1
+        self.prompt_tokens += record.prompt_tokens
+        self.cached_tokens += record.cached_tokens
+        self.completion_tokens += record.completion_tokens
+        if record.cost is None:
+            self.unpriced_requests += 1
+        else:
+            self.cost += record.cost
+
+
+class UsageLedger:
+    """An append-only CSV ledger of model request usage."""
+
+    FIELDS = [f.name for f in fields(UsageRecord)]
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        return self._path or app_dir() / "usage.csv"
+
+    def record(self, record: UsageRecord) -> None:
+        """Appends `record` to the ledger."""
+        with self._lock, self.path.open(mode="a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=self.FIELDS)
+            if f.tell() == 0:
+                writer.writeheader()
+            row = asdict(record)
+            row["timestamp"] = f"{record.timestamp:.3f}"
+            # an unknown cost is left empty
+            row["cost"] = "" if record.cost is None else f"{record.cost:.6f}"
+            writer.writerow(row)
+
+    def records(self) -> Iterator[UsageRecord]:
+        """Yields every record in the ledger, oldest first."""
+        if not self.path.exists():
+            return
+        with self.path.open(newline="") as f:
+            for row in csv.DictReader(f):
+                yield UsageRecord(
+                    timestamp=float(row["timestamp"]),
+                    session_id=row["session_id"],
+                    model=row["model"],
+                    prompt_tokens=int(row["prompt_tokens"]),
+                    completion_tokens=int(row["completion_tokens"]),
+                    cached_tokens=int(row["cached_tokens"]),
+                    cost=float(row["cost"]) if row["cost"] else None,
+                )
+
+    def report(
+        self, by: str = "day", since: Optional[float] = None
+    ) -> list[UsageSummary]:
+        """Aggregates usage per `"day"` or per `"session"`, oldest first."""
+        summaries: dict[str, UsageSummary] = {}
+        for record in self.records():
+            if since is not None and record.timestamp < since:
+                continue
+            if by == "day":
+                key = f"{datetime.date.fromtimestamp(record.timestamp)}"
+            else:
+                key = record.session_id
+            summaries.setdefault(key, UsageSummary(key)).add(record)
+        return list(summaries.values())
+
+
+class TokenBudget:
+    """Limits how many tokens a chat session and each of its requests may use.
+
+    Args:
+        session_tokens: The total (prompt + completion) tokens a session may use.
+        prompt_tokens: The prompt tokens a single request may use.
+    """
+
+    def __init__(
+        self, session_tokens: Optional[int] = None, prompt_tokens: Optional[int] = None
+    ) -> None:
+        self.session_tokens = session_tokens
+        self.prompt_tokens = prompt_tokens
+
+    @classmethod
+    def from_env(cls) -> "TokenBudget":
+        """Creates a budget configured from `EDDIE_*` environment variables."""
+
+        def getenv(name: str) -> Optional[int]:
+            value = os.environ.get(name)
+            return int(value) if value else None
+
+        return cls(
+            session_tokens=getenv("EDDIE_SESSION_TOKEN_BUDGET"),
+            prompt_tokens=getenv("EDDIE_PROMPT_TOKEN_BUDGET"),
+        )
+
+    def allowance(self, session_tokens_used: int) -> Optional[int]:
+        """Returns how many prompt tokens the next request may use, if limited."""
+        limits = [
+            limit
+            for limit in (
+                self.prompt_tokens,
+                None
+                if self.session_tokens is None
+                else self.session_tokens - session_tokens_used,
+            )
+            if limit is not None
+        ]
+        return min(limits) if limits else None
+
+
+ledger = UsageLedger()
+budget = TokenBudget.from_env()
+
+
+__all__ = (
+    "BudgetExceededError",
+    "TokenBudget",
+    "UsageLedger",
+    "UsageRecord",
+    "UsageSummary",
+    "budget",
+    "ledger",
+)
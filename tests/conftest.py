@@ -0,0 +1,131 @@
+import json
+import threading
+import time
+from typing import Any, Callable, Iterator, Union
+
+import pytest
+from mirascope.base import BaseConfig
+from openai.types.chat import ChatCompletionChunk
+from openai.types.chat.chat_completion_chunk import (
+    Choice,
+    ChoiceDelta,
+    ChoiceDeltaToolCall,
+    ChoiceDeltaToolCallFunction,
+)
+from openai.types.completion_usage import CompletionUsage
+
+from eddie_cli.calls import EddieChat
+from eddie_cli.tokens import estimate_message_tokens, estimate_tokens
+
+Response = Union[str, list[tuple[str, dict[str, Any]]]]
+"""A text reply, or a list of `(tool name, arguments)` tool calls."""
+
+
+def _chunk(delta: ChoiceDelta, finish_reason: Any = None) -> ChatCompletionChunk:
+    return ChatCompletionChunk(
+        id="fake",
+        choices=[Choice(index=0, delta=delta, finish_reason=finish_reason)],
+        created=int(time.time()),
+        model="gpt-4o",
+        object="chat.completion.chunk",
+    )
+
+
+class FakeOpenAI:
+    """A fake OpenAI client that streams scripted responses and records prompts.
+
+    Every stream ends with a usage chunk, like OpenAI's with `include_usage`.
+    """
+
+    def __init__(self, respond: Callable[[list[dict[str, Any]]], Response]) -> None:
+        self.respond = respond
+        self.prompts: list[list[dict[str, Any]]] = []
+        self.kwargs: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+        # mimic `client.chat.completions.create`
+        self.chat = self.completions = self
+
+    def create(self, messages: list[dict[str, Any]], **kwargs: Any) -> Any:
+        with self._lock:
+            self.prompts.append(messages)
+            self.kwargs.append(kwargs)
+            response = self.respond(messages)
+        return self._stream(messages, response)
+
+    def _stream(
+        self, messages: list[dict[str, Any]], response: Response
+    ) -> Iterator[ChatCompletionChunk]:
+        if isinstance(response, str):
+            yield _chunk(ChoiceDelta(role="assistant", content=response))
+            yield _chunk(ChoiceDelta(), "stop")
+            completion = response
+        else:
+            yield _chunk(ChoiceDelta(role="assistant", content=None))
+            for i, (name, args) in enumerate(response):
+                # like OpenAI, start each tool call before streaming its arguments
+                for tool_call in (
+                    ChoiceDeltaToolCall(
+                        index=i,
+                        id=f"call_{i}",
+                        type="function",
+                        function=ChoiceDeltaToolCallFunction(name=name, arguments=""),
+                    ),
+                    ChoiceDeltaToolCall(
+                        index=i,
+                        function=ChoiceDeltaToolCallFunction(
+                            arguments=json.dumps(args)
+                        ),
+                    ),
+                ):
+                    yield _chunk(ChoiceDelta(tool_calls=[tool_call]))
+            yield _chunk(ChoiceDelta(), "tool_calls")
+            completion = json.dumps(response)
+        prompt_tokens = estimate_message_tokens(messages)
+        completion_tokens = estimate_tokens(completion)
+        yield ChatCompletionChunk(
+            id="fake",
+            choices=[],
+            created=int(time.time()),
+            # like OpenAI, report the dated snapshot of the requested model
+            model="gpt-4o-2024-08-06",
+            object="chat.completion.chunk",
+            usage=CompletionUsage(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+            ),
+        )
+
+
+@pytest.fixture(autouse=True)
+def app_dir(tmp_path, monkeypatch):
+    """Points Eddie's app directory at a temporary directory for every test."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / ".config"))
+    return tmp_path / ".config" / "eddie-cli"
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    """Returns a function that makes `EddieChat` stream from a `FakeOpenAI`.
+
+    It takes either the list of responses to stream in order, or a function from
+    the prompt messages to the response.
+    """
+
+    def install(
+        responses: Union[list[Response], Callable[[list[dict[str, Any]]], Response]],
+    ) -> FakeOpenAI:
+        if callable(responses):
+            respond = responses
+        else:
+            remaining = iter(responses)
+            respond = lambda messages: next(remaining)  # noqa: E731
+        client = FakeOpenAI(respond)
+        monkeypatch.setattr(EddieChat, "api_key", "fake")
+        monkeypatch.setattr(
+            EddieChat, "configuration", BaseConfig(client_wrappers=[lambda _: client])
+        )
+        return client
+
+    return install
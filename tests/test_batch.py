@@ -0,0 +1,68 @@
+import json
+
+from eddie_cli.batch import (
+    WINDOW_PER_WORKER,
+    AskRequest,
+    AskResult,
+    ask,
+    ask_many,
+    read_requests,
+)
+
+
+def test_read_requests():
+    lines = [
+        '{"id": "a", "prompt": "Hi"}\n',
+        "\n",
+        '"Just a string"\n',
+        '{"prompt": "No id"}\n',
+    ]
+    assert list(read_requests(lines)) == [
+        AskRequest(id="a", prompt="Hi"),
+        AskRequest(id="3", prompt="Just a string"),
+        AskRequest(id="4", prompt="No id"),
+    ]
+
+
+def test_read_requests_turns_malformed_lines_into_errors():
+    lines = ['{"prompt": "ok"}', "{not json", '{"id": "x"}', "42"]
+    requests = list(read_requests(lines))
+    assert [request.id for request in requests] == ["1", "2", "3", "4"]
+    assert requests[0].error is None
+    assert all(request.error for request in requests[1:])
+
+
+def test_ask_reports_malformed_requests_without_calling_the_model(fake_openai):
+    client = fake_openai([])
+    result = ask(AskRequest(id="2", prompt="", error="Invalid JSON on line: ..."))
+    assert result == AskResult(id="2", error="Invalid JSON on line: ...")
+    assert not client.prompts
+
+
+def test_ask_many(fake_openai):
+    fake_openai(lambda messages: f"Echo: {messages[-1]['content']}")
+    lines = [json.dumps({"id": str(i), "prompt": f"prompt {i}"}) for i in range(8)]
+    lines.append("{broken")
+    results = {result.id: result for result in ask_many(read_requests(lines), 4)}
+    assert set(results) == {str(i) for i in range(8)} | {"9"}
+    for i in range(8):
+        assert results[str(i)].reply == f"Echo: prompt {i}"
+        assert results[str(i)].error is None
+    assert results["9"].error is not None
+    assert json.loads(results["0"].to_json())["reply"] == "Echo: prompt 0"
+
+
+def test_ask_many_streams_results_while_reading_requests(fake_openai):
+    fake_openai(lambda messages: "Ok.")
+    read = []
+
+    def requests():
+        for i in range(100):
+            read.append(i)
+            yield AskRequest(id=str(i), prompt=f"prompt {i}")
+
+    results = ask_many(requests(), workers=2)
+    next(results)
+    # only a bounded window is read ahead of the first result
+    assert len(read) <= 2 * WINDOW_PER_WORKER + 2
+    assert len(list(results)) == 99
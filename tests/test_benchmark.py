@@ -0,0 +1,73 @@
+from eddie_cli.benchmark import (
+    RunResult,
+    TurnResult,
+    compare,
+    load_versions,
+    run_benchmark,
+    run_fixture,
+    summarize,
+)
+
+FIXTURE = {"name": "tiny", "turns": [{"user": "Hi", "reply": "Hello there."}]}
+
+
+def run(version: str, memory_count: int, *prompt_tokens: int) -> RunResult:
+    turns = [TurnResult(tokens, tokens * 4, 1.0) for tokens in prompt_tokens]
+    return RunResult(version, "fixture", memory_count, turns)
+
+
+def report(**summaries):
+    return {"versions": {v: {"summary": s} for v, s in summaries.items()}}
+
+
+def test_summarize_per_memory_count():
+    summary = summarize([run("v", 0, 100, 200), run("v", 50, 400)])
+    assert summary["turns"] == 3
+    assert summary["prompt_tokens_by_memory_count"] == {
+        "0": {"mean": 150, "max": 200},
+        "50": {"mean": 400, "max": 400},
+    }
+    assert summary["mean_latency_ms"] == 1.0
+    assert summarize([run("v", 0, 100)], latency=False)["mean_latency_ms"] is None
+
+
+def test_compare_is_like_for_like():
+    unswept = summarize([run("0001", 0, 100)])
+    swept = summarize([run("0002", 0, 100), run("0002", 50, 1000)])
+    assert compare(report(**{"0001": unswept, "0002": swept})) == []
+
+
+def test_compare_detects_regressions():
+    old = summarize([run("0001", 0, 100), run("0001", 50, 500)])
+    new = summarize([run("0002", 0, 105), run("0002", 50, 600)])
+    regressions = compare(report(**{"0001": old, "0002": new}), tolerance=0.1)
+    assert len(regressions) == 2
+    assert all("with 50 memories" in regression for regression in regressions)
+
+
+def test_compare_against_baseline():
+    old = summarize([run("0001", 0, 100)])
+    new = summarize([run("0001", 0, 300)])
+    assert compare(report(**{"0001": new}), report(**{"0001": old}))
+    assert not compare(report(**{"0001": old}), report(**{"0001": old}))
+
+
+def test_run_fixture_against_every_version():
+    versions = load_versions()
+    assert versions
+    for version, eddie_chat in versions.items():
+        result = run_fixture(version, eddie_chat, FIXTURE)
+        assert result.error is None, result.error
+        assert result.turns and result.turns[0].prompt_tokens > 0
+
+
+def test_run_benchmark_only_measures_latency_serially():
+    serial = run_benchmark(fixtures=[FIXTURE], memory_counts=(0,), workers=1)
+    parallel = run_benchmark(fixtures=[FIXTURE], memory_counts=(0,), workers=4)
+    for version, results in parallel["versions"].items():
+        assert results["summary"]["mean_latency_ms"] is None
+        assert serial["versions"][version]["summary"]["mean_latency_ms"] is not None
+        assert (
+            results["summary"]["prompt_tokens_by_memory_count"]
+            == serial["versions"][version]["summary"]["prompt_tokens_by_memory_count"]
+        )
@@ -0,0 +1,113 @@
+from eddie_cli.compaction import (
+    cluster_memories,
+    compact,
+    compact_memories,
+    drop_redundant,
+    normalize,
+)
+from eddie_cli.memories import (
+    MemoryUsage,
+    load_memories,
+    load_memory_usage,
+    save_memories,
+    update_memories,
+    update_memory_usage,
+)
+
+MEMORIES = [
+    "User likes golf",
+    "User plays golf on weekends",
+    "User is allergic to peanuts",
+    "User is allergic to cats",
+    "User has a sister named Sam",
+    "User has a brother named Sam",
+    "User lives in Berlin",
+    "User works as a nurse",
+]
+
+
+def test_cluster_memories():
+    assert cluster_memories(MEMORIES) == [[0, 1], [2, 3], [4, 5], [6], [7]]
+
+
+def test_normalize():
+    assert normalize("  User likes GOLF. ") == normalize("user likes golf")
+    assert normalize("User's wife likes golf") != normalize("User likes golf")
+
+
+def test_drop_redundant_keeps_distinct_facts():
+    for cluster in (
+        ["User is allergic to peanuts", "User is allergic to cats"],
+        ["User has a sister named Sam", "User has a brother named Sam"],
+        ["User likes golf", "User plays golf on weekends"],
+        ["User is allergic to cats", "User is not allergic to cats"],
+        ["User is allergic to cats", "User's wife is allergic to cats"],
+        ["User likes golf", "User used to like golf"],
+        ["User used to like golf", "User likes golf"],
+        ["User likes golf", "User really likes golf"],
+        ["User likes golf", "He likes golf"],
+    ):
+        assert drop_redundant(cluster) == {memory: [memory] for memory in cluster}
+        assert compact(cluster).after == cluster
+
+
+def test_drop_redundant_drops_duplicates():
+    cluster = ["User likes golf", "User likes golf!", "user likes  golf."]
+    assert drop_redundant(cluster) == {"user likes  golf.": cluster}
+
+
+def test_drop_redundant_keeps_duplicates_at_the_newest_position():
+    cluster = ["User likes golf", "User is allergic to cats", "user likes golf."]
+    assert drop_redundant(cluster) == {
+        "User is allergic to cats": ["User is allergic to cats"],
+        "user likes golf.": ["User likes golf", "user likes golf."],
+    }
+
+
+def test_compact_without_llm_loses_no_facts():
+    result = compact(MEMORIES)
+    assert result.after == MEMORIES
+    assert result.merged == {}
+
+
+def test_compact_with_a_merging_summarizer():
+    def merge(cluster):
+        return {" / ".join(cluster): cluster}
+
+    result = compact(MEMORIES, merge)
+    assert "User likes golf / User plays golf on weekends" in result.after
+    assert len(result.after) == 5
+
+
+def test_compact_memories_rewrites_the_store_and_merges_usage():
+    save_memories(["User likes golf", "User likes golf.", "User is a nurse"])
+
+    def set_hits(memories, usage):
+        usage["User likes golf"] = MemoryUsage(created_at=1, hits=2)
+        usage["User likes golf."] = MemoryUsage(created_at=5, hits=3)
+
+    update_memory_usage(set_hits)
+
+    result = compact_memories()
+    assert result.applied
+    assert load_memories() == ["User likes golf.", "User is a nurse"]
+    usage = load_memory_usage()["User likes golf."]
+    assert usage.hits == 5 and usage.created_at == 1
+
+
+def test_compact_memories_dry_run():
+    save_memories(["User likes golf", "User likes golf."])
+    result = compact_memories(dry_run=True)
+    assert not result.applied and result.merged
+    assert len(load_memories()) == 2
+
+
+def test_compact_memories_keeps_memories_added_while_summarizing():
+    save_memories(["User likes golf", "User likes golf."])
+
+    def slow_summarizer(cluster):
+        update_memories(lambda memories: memories + ["User is a nurse"])
+        return drop_redundant(cluster)
+
+    assert compact_memories(slow_summarizer).applied
+    assert load_memories() == ["User likes golf.", "User is a nurse"]
@@ -0,0 +1,147 @@
+import pytest
+from typer.testing import CliRunner
+
+from eddie_cli.calls import EddieChat
+from eddie_cli.calls import eddie_chat as eddie_chat_module
+from eddie_cli.calls.eddie_chat import MAX_TOOL_ROUNDS
+from eddie_cli.main import cli
+from eddie_cli.memories import load_memories, save_memories, update_memories
+from eddie_cli.tokens import estimate_message_tokens
+from eddie_cli.transcripts import transcripts
+from eddie_cli.usage import BudgetExceededError, budget, ledger
+
+
+def chat(eddie: EddieChat, user_input: str) -> tuple[str, list[str]]:
+    chunks: list[str] = []
+    memories: list[str] = []
+    eddie.chat(user_input, chunks.append, memories.append)
+    return "".join(chunks), memories
+
+
+def test_text_turn(fake_openai):
+    client = fake_openai(["Hello there."])
+    eddie = EddieChat()
+    assert chat(eddie, "Hi!") == ("Hello there.", [])
+    assert client.prompts[0][-1] == {"role": "user", "content": "Hi!"}
+    assert eddie.history == [
+        {"role": "user", "content": "Hi!"},
+        {"role": "assistant", "content": "Hello there."},
+    ]
+    assert transcripts.search("hello")
+
+
+def test_tool_round_reports_only_its_own_memories(fake_openai, monkeypatch):
+    save_memories(["User likes golf"])
+
+    def update_racing_another_chat(update):
+        update_memories(lambda memories: memories + ["Another chat's memory"])
+        return update_memories(update)
+
+    monkeypatch.setattr(
+        eddie_chat_module, "update_memories", update_racing_another_chat
+    )
+    fake_openai(
+        [
+            [
+                ("Memorize", {"memory": "User likes golf"}),
+                ("Calculate", {"expression": "6 * 7"}),
+            ],
+            "Noted, and it's 42.",
+        ]
+    )
+    eddie = EddieChat()
+    reply, memories = chat(eddie, "I like golf. What's 6 times 7?")
+
+    assert reply == "Noted, and it's 42."
+    # a duplicate of an existing memory is still this chat's memory
+    assert memories == ["User likes golf"]
+    assert "Another chat's memory" not in eddie.memories
+    assert "Another chat's memory" in load_memories()
+    assert [message["role"] for message in eddie.history] == [
+        "user",
+        "assistant",
+        "tool",
+        "tool",
+        "assistant",
+    ]
+    assert eddie.history[3]["content"] == "42"
+
+
+def test_usage_of_every_request_is_recorded(fake_openai):
+    fake_openai([[("Calculate", {"expression": "1 + 1"})], "Two."])
+    eddie = EddieChat()
+    chat(eddie, "What's 1 + 1?")
+    records = list(ledger.records())
+    assert len(records) == 2
+    assert {record.session_id for record in records} == {eddie.session_id}
+    assert all(record.cost for record in records)
+    assert eddie._tokens_used == sum(record.total_tokens for record in records)
+
+
+def test_prompt_budget_drops_oldest_history(fake_openai, monkeypatch):
+    client = fake_openai(lambda messages: "Sure.")
+    eddie = EddieChat(memories=["User likes golf"])
+    for i in range(5):
+        chat(eddie, f"Message number {i}")
+    eddie.user_input = "One more"
+    monkeypatch.setattr(
+        budget, "prompt_tokens", estimate_message_tokens(eddie.messages()) - 10
+    )
+
+    chat(eddie, "One more")
+    prompt = client.prompts[-1]
+    assert estimate_message_tokens(prompt) <= budget.prompt_tokens
+    assert prompt[-1] == {"role": "user", "content": "One more"}
+    assert prompt[1]["role"] == "user"
+    assert "Message number 0" not in str(prompt)
+
+
+def test_prompt_budget_drops_oldest_memories(fake_openai, monkeypatch):
+    client = fake_openai(lambda messages: "Sure.")
+    save_memories([f"User fact number {i}" for i in range(20)])
+    eddie = EddieChat()
+    eddie.user_input = "Hi"
+    eddie.memories = load_memories()
+    full = estimate_message_tokens(eddie.messages())
+    monkeypatch.setattr(budget, "prompt_tokens", full - 20)
+
+    chat(eddie, "Hi")
+    assert estimate_message_tokens(client.prompts[-1]) <= full - 20
+    assert "User fact number 0\n" not in client.prompts[-1][0]["content"]
+    assert "User fact number 19" in client.prompts[-1][0]["content"]
+
+
+def test_session_budget_refuses_turns(fake_openai, monkeypatch):
+    fake_openai(lambda messages: "Sure.")
+    eddie = EddieChat()
+    chat(eddie, "Hi")
+    monkeypatch.setattr(budget, "session_tokens", eddie._tokens_used)
+    with pytest.raises(BudgetExceededError):
+        chat(eddie, "Hi again")
+
+
+def test_ask_reports_exceeded_budget_without_a_traceback(fake_openai, monkeypatch):
+    fake_openai(lambda messages: "Sure.")
+    monkeypatch.setattr(budget, "prompt_tokens", 1)
+    result = CliRunner().invoke(cli, ["ask", "Hi"])
+    assert result.exit_code == 1
+    assert isinstance(result.exception, SystemExit)
+
+
+def test_tool_rounds_are_limited(fake_openai):
+    def respond(messages):
+        if client.kwargs[-1].get("tool_choice") == "none":
+            return "Fine, it's 2."
+        return [("Calculate", {"expression": "1 + 1"})]
+
+    client = fake_openai(respond)
+    reply, _ = chat(EddieChat(), "What's 1 + 1? Keep checking.")
+    assert reply == "Fine, it's 2."
+    assert len(client.prompts) == MAX_TOOL_ROUNDS + 1
+
+
+def test_turn_fails_if_the_model_ignores_the_forced_reply(fake_openai):
+    client = fake_openai(lambda messages: [("Calculate", {"expression": "1 + 1"})])
+    with pytest.raises(RuntimeError):
+        chat(EddieChat(), "What's 1 + 1?")
+    assert len(client.prompts) == MAX_TOOL_ROUNDS + 1
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from eddie_cli.markdown_blocks import MarkdownBlocks
+
+REPLY = """# Heading
+
+A paragraph
+over two lines.
+
+- a list item
+
+- another item
+  continued
+
+```python
+def f():
+
+    return 1
+```
+
+Trailing paragraph."""
+
+BLOCKS = [
+    "# Heading",
+    "A paragraph\nover two lines.",
+    "- a list item\n\n- another item\n  continued",
+    "```python\ndef f():\n\n    return 1\n```",
+    "Trailing paragraph.",
+]
+
+
+def stream(chunks: list[str]) -> MarkdownBlocks:
+    blocks = MarkdownBlocks()
+    for chunk in chunks:
+        blocks.feed(chunk)
+    blocks.finish()
+    return blocks
+
+
+def test_splits_top_level_blocks():
+    assert stream([REPLY]).closed == BLOCKS
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_chunking_does_not_change_blocks(seed):
+    rng = random.Random(seed)
+    cuts = sorted(rng.sample(range(1, len(REPLY)), 15))
+    chunks = [REPLY[i:j] for i, j in zip([0] + cuts, cuts + [len(REPLY)])]
+    assert stream(chunks).closed == BLOCKS
+
+
+def test_feed_returns_newly_closed_blocks_and_tracks_open_block():
+    blocks = MarkdownBlocks()
+    assert blocks.feed("First para") == []
+    assert blocks.open == "First para"
+    assert blocks.feed("graph.\n\nSecond") == []
+    # whether a blank line ends a block is only known once the next line is done
+    assert blocks.feed(" one.\n") == ["First paragraph."]
+    assert blocks.open == "Second one."
+    assert blocks.finish() == ["Second one."]
+    assert blocks.open == ""
+
+
+def test_unclosed_fence_stays_open_until_finish():
+    blocks = MarkdownBlocks()
+    blocks.feed("```\ncode\n\nmore code\n")
+    assert blocks.closed == []
+    assert blocks.open == "```\ncode\n\nmore code"
+    assert blocks.finish() == ["```\ncode\n\nmore code"]
+
+
+def test_longer_fence_closes_only_on_matching_marker():
+    blocks = stream(["````\n```\nnested\n```\n````\nafter"])
+    assert blocks.closed == ["````\n```\nnested\n```\n````", "after"]
@@ -0,0 +1,74 @@
+import multiprocessing
+import pickle as pkl
+
+from eddie_cli.memories import (
+    load_memories,
+    load_memory_usage,
+    memories_path,
+    save_memories,
+    update_memories,
+    update_memory_usage,
+)
+
+PROCESSES = 12
+MEMORIES_PER_PROCESS = 25
+
+
+def memorize_many(worker: int) -> None:
+    for i in range(MEMORIES_PER_PROCESS):
+        memory = f"Memory {i} from worker {worker}"
+        update_memories(lambda memories: memories + [memory])
+
+
+def test_concurrent_processes_never_lose_memories():
+    # spawned processes inherit the temporary app directory through the environment
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=memorize_many, args=(worker,))
+        for worker in range(PROCESSES)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=120)
+        assert process.exitcode == 0
+
+    memories = load_memories()
+    assert len(memories) == PROCESSES * MEMORIES_PER_PROCESS
+    assert set(memories) == {
+        f"Memory {i} from worker {worker}"
+        for worker in range(PROCESSES)
+        for i in range(MEMORIES_PER_PROCESS)
+    }
+
+
+def test_save_and_load_round_trip():
+    assert load_memories() == []
+    save_memories(["User likes golf"])
+    assert load_memories() == ["User likes golf"]
+    assert not list(memories_path().parent.glob(".memories-*"))
+
+
+def test_corrupt_memories_are_quarantined():
+    memories_path().write_bytes(b"not a pickle")
+    assert load_memories() == []
+    assert not memories_path().exists()
+    assert len(list(memories_path().parent.glob("memories.pkl.corrupt-*"))) == 1
+
+
+def test_non_list_memories_are_quarantined():
+    memories_path().write_bytes(pkl.dumps({"not": "a list"}))
+    assert load_memories() == []
+
+
+def test_update_memory_usage_drops_stale_entries():
+    save_memories(["a", "b"])
+
+    def hit(memories, usage):
+        usage["a"].hits += 1
+
+    usage = update_memory_usage(hit)
+    assert set(usage) == {"a", "b"} and usage["a"].hits == 1
+    save_memories(["a"])
+    update_memory_usage(lambda memories, usage: None)
+    assert set(load_memory_usage()) == {"a"}
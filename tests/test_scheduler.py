@@ -0,0 +1,135 @@
+import email.utils
+import time
+
+import httpx
+import openai
+import pytest
+
+from eddie_cli.calls import EddieChat, MergeMemories
+from eddie_cli.scheduler import RequestScheduler, TokenBucket, retry_after
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def rate_limit_error(headers=None) -> openai.RateLimitError:
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers=headers or {}, request=request)
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def test_token_bucket_queues_reservations():
+    clock = FakeClock()
+    bucket = TokenBucket(capacity=2, refill_per_second=1, clock=clock)
+    assert bucket.reserve(1) == 0.0
+    assert bucket.reserve(1) == 0.0
+    # reservations queue up behind each other
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    assert bucket.reserve(1) == pytest.approx(2.0)
+    clock.now = 10.0
+    assert bucket.reserve(2) == 0.0
+
+
+def test_token_bucket_caps_reservations_at_capacity():
+    bucket = TokenBucket(capacity=10, refill_per_second=1, clock=FakeClock())
+    assert bucket.reserve(1000) == 0.0
+    assert bucket.reserve(5) == pytest.approx(5.0)
+
+
+def test_token_bucket_drain():
+    clock = FakeClock()
+    bucket = TokenBucket(capacity=60, refill_per_second=1, clock=clock)
+    bucket.drain()
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({}, None),
+        ({"retry-after-ms": "1500"}, 1.5),
+        ({"retry-after": "3"}, 3.0),
+        ({"retry-after": "1m30s"}, 90.0),
+        ({"retry-after": "garbage"}, None),
+        ({"x-ratelimit-reset-requests": "20ms"}, 0.02),
+        ({"x-ratelimit-reset-requests": "1s", "x-ratelimit-reset-tokens": "6m0s"}, 360),
+        ({"retry-after-ms": "nope", "retry-after": "2"}, 2.0),
+    ],
+)
+def test_retry_after(headers, expected):
+    if expected is None:
+        assert retry_after(headers) is None
+    else:
+        assert retry_after(headers) == pytest.approx(expected)
+
+
+def test_retry_after_http_date():
+    date = email.utils.formatdate(time.time() + 30, usegmt=True)
+    assert retry_after({"retry-after": date}) == pytest.approx(30, abs=2)
+
+
+def test_scheduler_retries_before_the_first_chunk():
+    sleeps = []
+    scheduler = RequestScheduler(max_retries=3, base_delay=1, sleep=sleeps.append)
+    attempts = []
+
+    def start():
+        attempts.append(None)
+        if len(attempts) < 3:
+            raise rate_limit_error({"retry-after": "5"})
+        yield from ["a", "b"]
+
+    assert list(scheduler.stream(start)) == ["a", "b"]
+    assert len(attempts) == 3
+    # the provider's retry-after wins over the shorter exponential backoff
+    assert sleeps == [5.0, 5.0]
+    assert scheduler.metrics.retries == 2
+    assert scheduler.metrics.requests == 3
+    assert scheduler.metrics.queue_depth == 0
+
+
+def test_scheduler_gives_up_after_max_retries():
+    scheduler = RequestScheduler(max_retries=2, sleep=lambda _: None)
+
+    def start():
+        raise rate_limit_error()
+        yield
+
+    with pytest.raises(openai.RateLimitError):
+        list(scheduler.stream(start))
+    assert scheduler.metrics.retries == 2
+
+
+def test_scheduler_does_not_retry_after_the_first_chunk():
+    scheduler = RequestScheduler(sleep=lambda _: None)
+
+    def start():
+        yield "a"
+        raise rate_limit_error()
+
+    stream = scheduler.stream(start)
+    assert next(stream) == "a"
+    with pytest.raises(openai.RateLimitError):
+        next(stream)
+    assert scheduler.metrics.retries == 0
+
+
+def test_scheduler_throttles_on_token_limit():
+    sleeps = []
+    scheduler = RequestScheduler(tokens_per_minute=600, sleep=sleeps.append)
+    list(scheduler.stream(lambda: iter(["a"]), tokens=600))
+    list(scheduler.stream(lambda: iter(["b"]), tokens=60))
+    assert len(sleeps) == 1 and sleeps[0] == pytest.approx(6.0, rel=0.01)
+
+
+@pytest.mark.parametrize("call", [EddieChat, MergeMemories])
+def test_calls_leave_retries_to_the_scheduler(call):
+    client = openai.OpenAI(api_key="fake")
+    for wrapper in call.configuration.client_wrappers:
+        client = wrapper(client)
+    assert client.max_retries == 0
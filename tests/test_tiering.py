@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+from eddie_cli.memories import (
+    MemoryUsage,
+    load_memory_usage,
+    save_memories,
+    update_memory_usage,
+)
+from eddie_cli.tiering import SECONDS_PER_DAY, MemoryTiers
+
+
+def test_score_decays_with_half_life():
+    tiers = MemoryTiers(half_life_days=7)
+    now = time.time()
+    fresh = MemoryUsage(last_referenced_at=now, hits=3)
+    week_old = MemoryUsage(last_referenced_at=now - 7 * SECONDS_PER_DAY, hits=3)
+    assert tiers.score(fresh, now) == pytest.approx(4)
+    assert tiers.score(week_old, now) == pytest.approx(2)
+
+
+def test_score_prefers_frequent_and_recent():
+    tiers = MemoryTiers()
+    now = time.time()
+    assert tiers.score(MemoryUsage(last_referenced_at=now, hits=5), now) > tiers.score(
+        MemoryUsage(last_referenced_at=now, hits=1), now
+    )
+    assert tiers.score(MemoryUsage(last_referenced_at=now, hits=1), now) > tiers.score(
+        MemoryUsage(last_referenced_at=now - 30 * SECONDS_PER_DAY, hits=1), now
+    )
+
+
+def test_split_caps_hot_tier_size_and_keeps_stored_order():
+    tiers = MemoryTiers(hot_size=2)
+    memories = ["a", "b", "c", "d"]
+    usage = {
+        "a": MemoryUsage(hits=0),
+        "b": MemoryUsage(hits=9),
+        "c": MemoryUsage(hits=1),
+        "d": MemoryUsage(hits=5),
+    }
+    assert tiers.split(memories, usage) == (["b", "d"], ["a", "c"])
+
+
+def test_split_caps_hot_tier_tokens():
+    tiers = MemoryTiers(hot_tokens=10)
+    long_memory = "x" * 100
+    memories = [long_memory, "short one"]
+    usage = {long_memory: MemoryUsage(hits=9), "short one": MemoryUsage()}
+    assert tiers.split(memories, usage) == (["short one"], [long_memory])
+
+
+def test_select_recalls_relevant_archived_memories_and_promotes_them():
+    memories = [f"User fact number {i}" for i in range(5)] + [
+        "User is allergic to peanuts"
+    ]
+    save_memories(memories)
+
+    def make_hot(memories, usage):
+        for i in range(5):
+            usage[f"User fact number {i}"].hits = 10
+
+    update_memory_usage(make_hot)
+    tiers = MemoryTiers(hot_size=5)
+    assert "User is allergic to peanuts" not in tiers.hot_memories()
+
+    selected = tiers.select("Can I eat peanuts?")
+    assert "User is allergic to peanuts" in selected
+    assert load_memory_usage()["User is allergic to peanuts"].hits == 1
+    assert "User is allergic to peanuts" not in tiers.select("What's the weather?")
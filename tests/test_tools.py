@@ -0,0 +1,138 @@
+import json
+import threading
+import time
+
+import pytest
+from mirascope.openai import OpenAITool
+from openai.types.chat import ChatCompletionMessageToolCall
+from openai.types.chat.chat_completion_message_tool_call import Function
+
+from eddie_cli.tools import ToolRegistry, calculate
+
+
+def make_tool(fn, args) -> OpenAITool:
+    tool_type = OpenAITool.from_fn(fn)
+    return tool_type.from_tool_call(
+        ChatCompletionMessageToolCall(
+            id="call",
+            type="function",
+            function=Function(name=tool_type.__name__, arguments=json.dumps(args)),
+        )
+    )
+
+
+@pytest.fixture
+def registry():
+    return ToolRegistry(max_workers=4)
+
+
+def test_results_keep_call_order_and_run_concurrently(registry):
+    started = threading.Barrier(2, timeout=5)
+
+    @registry.register
+    def slow(value: str) -> str:
+        """Returns `value` slowly."""
+        started.wait()
+        time.sleep(0.2)
+        return value
+
+    @registry.register
+    def fast(value: str) -> dict:
+        """Returns `value` quickly."""
+        started.wait()
+        return {"value": value}
+
+    results = registry.run(
+        [make_tool(slow, {"value": "a"}), make_tool(fast, {"value": "b"})]
+    )
+    assert [result.content for result in results] == ["a", '{"value": "b"}']
+    assert registry.fns == [slow, fast]
+
+
+def test_timeouts_and_errors_become_messages(registry):
+    release = threading.Event()
+
+    @registry.register(timeout=0.1)
+    def hang() -> str:
+        """Hangs."""
+        release.wait(5)
+        return "done"
+
+    @registry.register
+    def fail() -> str:
+        """Fails."""
+        raise RuntimeError("boom")
+
+    start = time.monotonic()
+    results = registry.run([make_tool(hang, {}), make_tool(fail, {})])
+    release.set()
+    assert time.monotonic() - start < 2
+    assert results[0].content == "Error: `Hang` timed out after 0.1s."
+    assert results[1].content == "Error: `Fail` failed with RuntimeError: boom"
+
+
+def test_saved_memory_only_for_tools_that_save_memories(registry):
+    @registry.register(saves_memory=True)
+    def remember(memory: str) -> str:
+        """Remembers `memory`."""
+        return memory
+
+    @registry.register
+    def echo(text: str) -> str:
+        """Echoes `text`."""
+        return text
+
+    @registry.register(saves_memory=True)
+    def broken(memory: str) -> str:
+        """Fails to remember `memory`."""
+        raise OSError("disk full")
+
+    results = registry.run(
+        [
+            make_tool(remember, {"memory": "User likes golf"}),
+            make_tool(echo, {"text": "hi"}),
+            make_tool(broken, {"memory": "User is tall"}),
+        ]
+    )
+    assert [result.saved_memory for result in results] == [
+        "User likes golf",
+        None,
+        None,
+    ]
+
+
+@pytest.mark.parametrize(
+    "expression, expected",
+    [
+        ("2 * (3 + 4) ** 2", "98"),
+        ("sqrt(16) + abs(-2)", "6.0"),
+        ("round(pi, 2)", "3.14"),
+        ("2 ** 100", str(2**100)),
+        ("1 ** (10 ** 100)", "1"),
+        ("10 ** -2", "0.01"),
+    ],
+)
+def test_calculate(expression, expected):
+    assert calculate(expression) == expected
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "((10**1000)**1000)**1000",
+        "9**9**9",
+        "round(5, -10**9)",
+        "round(5, 10**7)",
+        "round(5, 0.5)",
+        "(2**6000) * (2**6000)",
+        "__import__('os')",
+        "(1).__class__",
+        "open('x')",
+        "[1, 2]",
+    ],
+)
+def test_calculate_rejects_unsafe_or_huge_expressions(expression):
+    start = time.monotonic()
+    with pytest.raises(ValueError):
+        calculate(expression)
+    assert time.monotonic() - start < 1
@@ -0,0 +1,47 @@
+import pytest
+
+from eddie_cli.transcripts import TranscriptIndex, _match_expression
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = TranscriptIndex(tmp_path / "transcripts.db")
+    index.add_turn("s1", "How do I bake bread?", "Flour, water, yeast and patience.")
+    index.add_turn("s1", "What about sourdough?", "Use a starter instead of yeast.")
+    index.add_turn("s2", "Tell me about golf", "It's a good walk spoiled.")
+    return index
+
+
+def test_match_expression_quotes_every_word():
+    assert _match_expression("bread  yeast") == '"bread" "yeast"'
+    assert _match_expression('say "hi"') == '"say" """hi"""'
+    assert _match_expression("   ") == ""
+
+
+@pytest.mark.parametrize(
+    "query", ['"', "NEAR(a b)", "a OR", "col:value", "*", "(", "-x", "AND"]
+)
+def test_search_never_parses_user_input_as_query_syntax(index, query):
+    assert isinstance(index.search(query), list)
+
+
+def test_search_ranks_and_highlights(index):
+    hits = index.search("yeast")
+    assert len(hits) == 2
+    assert all("[yeast]" in hit.assistant_snippet for hit in hits)
+    assert {hit.session_id for hit in hits} == {"s1"}
+
+
+def test_search_stems_and_requires_every_word(index):
+    assert len(index.search("baking")) == 1
+    assert index.search("bread golf") == []
+
+
+def test_search_paginates(index):
+    first, second = index.search("yeast", limit=1), index.search("yeast", offset=1)
+    assert len(first) == len(second) == 1
+    assert first[0].user_snippet != second[0].user_snippet
+
+
+def test_empty_query(index):
+    assert index.search("") == []
@@ -0,0 +1,108 @@
+import datetime
+
+import pytest
+from openai.types.completion_usage import CompletionUsage
+
+from eddie_cli.usage import TokenBudget, UsageLedger, UsageRecord
+
+
+def record(session_id: str, day: datetime.date, tokens: int) -> UsageRecord:
+    timestamp = datetime.datetime.combine(day, datetime.time(12)).timestamp()
+    return UsageRecord(timestamp, session_id, "gpt-4o", tokens, tokens // 10, 5, 0.01)
+
+
+def test_from_usage_reads_cached_tokens_and_cost():
+    usage = CompletionUsage(
+        prompt_tokens=1000, completion_tokens=100, total_tokens=1100
+    )
+    usage.prompt_tokens_details = {"cached_tokens": 400}
+    result = UsageRecord.from_usage("s", "gpt-4o", usage)
+    assert (result.prompt_tokens, result.completion_tokens) == (1000, 100)
+    assert result.cached_tokens == 400
+    assert result.total_tokens == 1100
+    assert result.cost > 0
+
+
+def test_from_usage_prices_dated_models():
+    usage = CompletionUsage(prompt_tokens=10, completion_tokens=1, total_tokens=11)
+    dated = UsageRecord.from_usage("s", "gpt-4o-2024-08-06", usage)
+    assert dated.cost == UsageRecord.from_usage("s", "gpt-4o", usage).cost
+    assert dated.cost is not None and dated.cost > 0
+
+
+def test_from_usage_for_unknown_models():
+    usage = CompletionUsage(prompt_tokens=10, completion_tokens=1, total_tokens=11)
+    result = UsageRecord.from_usage("s", "some-unknown-model", usage)
+    assert result.cached_tokens == 0 and result.cost is None
+
+
+def test_ledger_round_trip(tmp_path):
+    ledger = UsageLedger(tmp_path / "usage.csv")
+    assert list(ledger.records()) == []
+    first = record("a", datetime.date(2026, 1, 1), 100)
+    ledger.record(first)
+    ledger.record(record("b", datetime.date(2026, 1, 2), 200))
+    records = list(ledger.records())
+    assert len(records) == 2
+    assert records[0] == first
+    assert (tmp_path / "usage.csv").read_text().count("timestamp") == 1
+
+
+def test_ledger_keeps_unknown_costs_unknown(tmp_path):
+    ledger = UsageLedger(tmp_path / "usage.csv")
+    day = datetime.date(2026, 1, 1)
+    unpriced = UsageRecord(0.0, "a", "some-unknown-model", 10, 1)
+    ledger.record(unpriced)
+    ledger.record(record("a", day, 100))
+    assert next(ledger.records()).cost is None
+    [summary] = ledger.report(by="session")
+    assert summary.requests == 2 and summary.unpriced_requests == 1
+    assert summary.cost == pytest.approx(0.01)
+
+
+def test_ledger_report(tmp_path):
+    ledger = UsageLedger(tmp_path / "usage.csv")
+    for session_id, day, tokens in [
+        ("a", datetime.date(2026, 1, 1), 100),
+        ("a", datetime.date(2026, 1, 2), 200),
+        ("b", datetime.date(2026, 1, 2), 300),
+    ]:
+        ledger.record(record(session_id, day, tokens))
+
+    by_day = ledger.report(by="day")
+    assert [(s.key, s.requests, s.prompt_tokens) for s in by_day] == [
+        ("2026-01-01", 1, 100),
+        ("2026-01-02", 2, 500),
+    ]
+    assert by_day[1].cached_tokens == 10 and by_day[1].cost == pytest.approx(0.02)
+
+    by_session = ledger.report(by="session")
+    assert [(s.key, s.requests, s.completion_tokens) for s in by_session] == [
+        ("a", 2, 30),
+        ("b", 1, 30),
+    ]
+
+    since = datetime.datetime(2026, 1, 2).timestamp()
+    assert [s.key for s in ledger.report(since=since)] == ["2026-01-02"]
+
+
+@pytest.mark.parametrize(
+    "session_tokens, prompt_tokens, used, expected",
+    [
+        (None, None, 0, None),
+        (None, 500, 10_000, 500),
+        (1000, None, 300, 700),
+        (1000, 500, 300, 500),
+        (1000, 500, 800, 200),
+        (1000, None, 1200, -200),
+    ],
+)
+def test_budget_allowance(session_tokens, prompt_tokens, used, expected):
+    assert TokenBudget(session_tokens, prompt_tokens).allowance(used) == expected
+
+
+def test_budget_from_env(monkeypatch):
+    monkeypatch.setenv("EDDIE_SESSION_TOKEN_BUDGET", "5000")
+    monkeypatch.delenv("EDDIE_PROMPT_TOKEN_BUDGET", raising=False)
+    budget = TokenBudget.from_env()
+    assert (budget.session_tokens, budget.prompt_tokens) == (5000, None)